@@ -1,61 +1,235 @@
 # actions.py
+import gc
+import contextlib
+
 import pygame
-from map_objects import ITEM_REGISTRY
+from map_objects import ITEM_REGISTRY, Solve_mode
+from history import MISSING
 
 def place_object(editor, new_obj):
     """放置物品，处理层级冲突"""
-    to_remove = []
-    for obj in editor.objects:
-        if obj.gx == new_obj.gx and obj.gy == new_obj.gy:
-            if obj.layer_id == new_obj.layer_id:
-                to_remove.append(obj)
-    
-    for obj in to_remove:
-        editor.objects.remove(obj)
-    editor.objects.append(new_obj)
-    editor.objects.sort(key=lambda o: o.z_index)
+    _, to_remove = editor.objects.replace_layers([new_obj])
+    editor.history.record(added=[new_obj], removed=to_remove)
+
+@contextlib.contextmanager
+def _bulk_alloc():
+    """批量创建成千上万个物品时暂停循环垃圾回收，避免分配过程中反复触发全量扫描"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def place_objects(editor, new_objs):
+    """批量放置物品：冲突规则与 place_object 相同，但只遍历、排序涉及的块"""
+    placed, removed = editor.objects.replace_layers(new_objs)
+    if placed:
+        editor.history.record(added=placed, removed=removed)
+
+def merge_solver_results(editor, results, conflict="keep"):
+    """
+    将求解器输出的 Solve_mode 字典批量合并到盘面，整体作为一个撤销步骤
+    按 (x, y, dir) 与盘面已有的标记去重；同一条边上线/叉不一致时按 conflict 处理:
+        "keep"     保留盘面已有标记
+        "replace"  以求解结果为准
+    返回 {"added": 新增数, "changed": 被改写数, "conflicts": 冲突数}
+    """
+    existing = {}
+    for o in editor.objects:
+        if o.placement_type == 'edge':
+            existing[(o.gx, o.gy, o.data.get('dir'))] = o
+
+    batch = {}
+    added = changed = conflicts = 0
+    for d in results:
+        data = d['data']
+        key = (d['x'], d['y'], data['dir'])
+        if key in batch:
+            continue
+        old = existing.get(key)
+        if old is None:
+            added += 1
+        elif old.data.get('style') == data['style']:
+            continue
+        else:
+            conflicts += 1
+            if conflict != "replace":
+                continue
+            changed += 1
+        batch[key] = Solve_mode.from_dict(d)
+
+    place_objects(editor, batch.values())
+    return {"added": added, "changed": changed, "conflicts": conflicts}
+
+def remove_objects(editor, objs):
+    """批量删除指定的物品对象"""
+    if objs:
+        editor.history.record(removed=editor.objects.remove_many(objs))
+
+def remove_objects_at(editor, cells, target_layer_id):
+    """批量删除若干格子上指定层级的物品 (按格子查找，只读入涉及的块)"""
+    targets = []
+    for gx, gy in set(cells):
+        obj = editor.objects.find(gx, gy, target_layer_id)
+        if obj is not None:
+            targets.append(obj)
+    remove_objects(editor, targets)
+
+def clear_objects(editor, predicate=None, rect=None):
+    """
+    批量删除满足条件的物品 (predicate 为 None 时删除全部)，返回删除的数量
+    rect 给定时只检查坐标落在该范围内的块
+    """
+    if predicate is None:
+        removed = list(editor.objects)
+        editor.objects.clear()
+    else:
+        removed = editor.objects.remove_where(predicate, rect)
+    editor.history.record(removed=removed)
+    return len(removed)
+
+def replace_objects(editor, new_objs):
+    """用新的物品列表替换整个盘面 (如读取存档)，可整体撤销"""
+    new_objs = list(new_objs)
+    removed = editor.objects.replace(new_objs)
+    editor.history.record(added=new_objs, removed=removed)
+
+def set_object_data(editor, obj, key, value):
+    """修改物品属性 (如数字)，并记录以便撤销"""
+    old = obj.data.get(key, MISSING)
+    obj.data[key] = value
+    editor.objects.mark_dirty(obj)
+    editor.history.record_data(obj, key, old, value)
+
+def grid_line(x0, y0, x1, y1):
+    """
+    4-连通的网格直线 (用于补全快速拖拽时跳过的格子)
+    返回从 (x0, y0) 到 (x1, y1) 依次经过的格子 (含两端)，相邻两格恰好相差一步
+    """
+    dx, dy = abs(x1 - x0), abs(y1 - y0)
+    sx = 1 if x1 > x0 else -1
+    sy = 1 if y1 > y0 else -1
+    x, y = x0, y0
+    cells = [(x, y)]
+    ix = iy = 0
+    while ix < dx or iy < dy:
+        # 比较水平/竖直各走一步后哪个更贴近理想直线 (整数形式的 (ix+0.5)/dx < (iy+0.5)/dy)
+        if (1 + 2 * ix) * dy < (1 + 2 * iy) * dx:
+            x += sx
+            ix += 1
+        else:
+            y += sy
+            iy += 1
+        cells.append((x, y))
+    return cells
+
+# --- 区域操作 ---
+def normalize_rect(start, end):
+    """由两个角的格子坐标得到 (x0, y0, x1, y1)，两端均包含"""
+    (ax, ay), (bx, by) = start, end
+    return min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)
+
+def object_in_rect(obj, rect):
+    """
+    判断物品是否属于选区
+    格点物品覆盖选区四周的格点，边只有两侧格子都在选区内时才算
+    """
+    x0, y0, x1, y1 = rect
+    if obj.placement_type == 'vertex':
+        return x0 <= obj.gx <= x1 + 1 and y0 <= obj.gy <= y1 + 1
+    if not (x0 <= obj.gx <= x1 and y0 <= obj.gy <= y1):
+        return False
+    if obj.placement_type == 'edge':
+        if obj.data.get('dir') == 'right':
+            return obj.gx + 1 <= x1
+        return obj.gy + 1 <= y1
+    return True
+
+def fill_region(editor, rect, cls):
+    """用指定物品填满选区 (边工具填充选区内部的所有连线)，返回放置的数量"""
+    x0, y0, x1, y1 = rect
+    with _bulk_alloc():
+        if cls.placement_type == 'vertex':
+            new_objs = [cls(x, y) for y in range(y0, y1 + 2) for x in range(x0, x1 + 2)]
+        elif cls.placement_type == 'edge':
+            new_objs = [cls(x, y, 'right') for y in range(y0, y1 + 1) for x in range(x0, x1)]
+            new_objs += [cls(x, y, 'down') for y in range(y0, y1) for x in range(x0, x1 + 1)]
+        else:
+            new_objs = [cls(x, y) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+        place_objects(editor, new_objs)
+    return len(new_objs)
+
+def clear_region(editor, rect, cls=None):
+    """清除选区内指定种类的物品 (cls 为 None 时清除全部)，返回删除的数量"""
+    x0, y0, x1, y1 = rect
+    # 格点物品可以落在选区右下方一格
+    return clear_objects(editor, lambda o: (cls is None or isinstance(o, cls)) and object_in_rect(o, rect),
+                         rect=(x0, y0, x1 + 1, y1 + 1))
+
+def copy_region(editor, rect):
+    """复制选区内的全部物品 (含提示与连线)，返回以选区左上角为原点的字典列表"""
+    x0, y0, x1, y1 = rect
+    clip = []
+    for o in editor.objects.in_rect(x0, y0, x1 + 1, y1 + 1):
+        if object_in_rect(o, rect):
+            d = o.to_dict()
+            clip.append({"type": d["type"], "x": d["x"] - x0, "y": d["y"] - y0, "data": dict(d["data"])})
+    return clip
+
+def paste_region(editor, clip, gx, gy):
+    """将 copy_region 的结果以 (gx, gy) 为左上角粘贴，返回放置的数量"""
+    name_map = {cls.__name__: cls for cls in ITEM_REGISTRY}
+    with _bulk_alloc():
+        new_objs = [
+            name_map[d["type"]].from_dict({"x": d["x"] + gx, "y": d["y"] + gy, "data": dict(d["data"])})
+            for d in clip if d["type"] in name_map
+        ]
+        place_objects(editor, new_objs)
+    return len(new_objs)
 
 def remove_object_at(editor, gx, gy, target_layer_id=None):
     """删除指定位置的物品"""
-    candidates = [o for o in editor.objects if o.gx == gx and o.gy == gy]
+    candidates = editor.objects.at(gx, gy)
     if not candidates: return
 
     if target_layer_id:
-        for obj in candidates:
-            if obj.layer_id == target_layer_id:
-                editor.objects.remove(obj)
+        targets = [obj for obj in candidates if obj.layer_id == target_layer_id]
     else:
-        candidates.sort(key=lambda o: o.z_index, reverse=True)
-        if candidates:
-            editor.objects.remove(candidates[0])
+        targets = [candidates[-1]]  # z_index 最高的物品
+    editor.history.record(removed=editor.objects.remove_many(targets))
 
 def handle_continuous_tool(editor, curr_gx, curr_gy, tool_cls):
-    """处理连续拖拽工具的核心逻辑（如画线、画叉）"""
-    prev_gx, prev_gy = editor.last_drag_grid
-    if (curr_gx, curr_gy) == (prev_gx, prev_gy):
+    """
+    处理连续拖拽工具的核心逻辑（如画线、画叉）
+    两次处理之间鼠标可能跨过多个格子，先按网格直线补全路径，再把整段笔画一次性写入
+    """
+    prev = editor.last_drag_grid
+    if (curr_gx, curr_gy) == prev:
         return
 
-    # 1. 计算目标边缘位置
-    target_obj = None
-    if curr_gx == prev_gx + 1 and curr_gy == prev_gy:
-        target_obj = tool_cls(prev_gx, prev_gy, 'right')
-    elif curr_gx == prev_gx - 1 and curr_gy == prev_gy:
-        target_obj = tool_cls(curr_gx, curr_gy, 'right')
-    elif curr_gx == prev_gx and curr_gy == prev_gy + 1:
-        target_obj = tool_cls(prev_gx, prev_gy, 'down')
-    elif curr_gx == prev_gx and curr_gy == prev_gy - 1:
-        target_obj = tool_cls(curr_gx, curr_gy, 'down')
-    
-    if target_obj:
+    pending = {}  # 本段笔画中已改动的位置: (gx, gy, layer_id) -> 物品 (None 表示已删除)
+    is_right_btn = pygame.mouse.get_pressed()[2]
+    to_place, to_remove = [], []
+
+    path = grid_line(prev[0], prev[1], curr_gx, curr_gy)
+    for (px, py), (cx, cy) in zip(path, path[1:]):
+        # 1. 计算目标边缘位置
+        if cx == px + 1:
+            target_obj = tool_cls(px, py, 'right')
+        elif cx == px - 1:
+            target_obj = tool_cls(cx, cy, 'right')
+        elif cy == py + 1:
+            target_obj = tool_cls(px, py, 'down')
+        else:
+            target_obj = tool_cls(cx, cy, 'down')
+
         # 2. 检查该位置是否已有物品
-        existing = None
-        for obj in editor.objects:
-            if obj.gx == target_obj.gx and obj.gy == target_obj.gy and obj.layer_id == target_obj.layer_id:
-                existing = obj
-                break
-        
+        key = (target_obj.gx, target_obj.gy, target_obj.layer_id)
+        existing = pending[key] if key in pending else editor.objects.find(*key)
+
         # 3. 确定操作模式 (仅在拖拽开始时确定一次)
-        is_right_btn = pygame.mouse.get_pressed()[2]
         if editor.edge_op_mode is None:
             if is_right_btn:
                 if existing and existing.data.get('style') == 'cross':
@@ -68,16 +242,23 @@ def handle_continuous_tool(editor, curr_gx, curr_gy, tool_cls):
                 else:
                     editor.edge_op_mode = 'draw_line'
 
-        # 4. 执行增删改
+        # 4. 记录增删改
         if editor.edge_op_mode == 'del_line' and existing and existing.data.get('style') == 'line':
-            editor.objects.remove(existing)
+            to_remove.append(existing)
+            pending[key] = None
         elif editor.edge_op_mode == 'del_cross' and existing and existing.data.get('style') == 'cross':
-            editor.objects.remove(existing)
+            to_remove.append(existing)
+            pending[key] = None
         elif editor.edge_op_mode == 'draw_line':
             target_obj.data['style'] = 'line'
-            place_object(editor, target_obj)
+            to_place.append(target_obj)
+            pending[key] = target_obj
         elif editor.edge_op_mode == 'draw_cross':
             target_obj.data['style'] = 'cross'
-            place_object(editor, target_obj)
+            to_place.append(target_obj)
+            pending[key] = target_obj
 
+    # 5. 整段笔画批量写入
+    remove_objects(editor, to_remove)
+    place_objects(editor, to_place)
     editor.last_drag_grid = (curr_gx, curr_gy)
\ No newline at end of file
@@ -0,0 +1,397 @@
+"""
+基准测试脚本
+生成可复现的题目语料 (Numberlink / Slitherlink / Simpleloop / Yajilin)，
+并对求解、推理、唯一性检查、读写、渲染及区域编辑进行无界面计时。
+
+用法:
+    python benchmark.py corpus --out bench_corpus
+    python benchmark.py run --out bench_results.json
+    python benchmark.py compare baseline.json bench_results.json
+    python benchmark.py startup --out bench_startup.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import contextlib
+import subprocess
+
+from generator import random_solution_paths, path_edges, vertex_edges
+
+DEFAULT_SIZES = [10, 25, 50, 100]   # 语料尺寸 (边长)
+DEFAULT_SOLVE_SIZES = [10]          # 参与 Z3 计时的尺寸 (大盘面求解耗时过长)
+DEFAULT_FASTPATH_SIZES = [5, 8, 10, 15]  # 原生搜索快速路径对比的尺寸
+DEFAULT_EDIT_SIZES = [50, 200]      # 区域批量编辑的尺寸
+DEFAULT_YAJILIN_SIZES = [7, 10]     # Yajilin 求解计时的尺寸 (常见题目大小)
+KINDS = ["numberlink", "slitherlink", "simpleloop"]
+
+
+# --- 语料生成 ---
+def generate_board(kind, w, h, seed):
+    """
+    生成一个保证有解的盘面 (序列化字典列表，与存档格式一致)
+    :param kind: 'numberlink' / 'slitherlink' / 'simpleloop'
+    """
+    rng = random.Random(f"{kind}-{w}x{h}-{seed}")
+    paths = random_solution_paths(w, h, rng)
+    board = [{"type": "FloorCell", "x": x, "y": y, "data": {}} for y in range(h) for x in range(w)]
+
+    for num, path in enumerate(paths, 1):
+        for x, y in (path[0], path[-1]):
+            board.append({"type": "EndPoint", "x": x, "y": y, "data": {"num": num}})
+
+    if kind == "slitherlink":
+        # 按解统计每个格点周围四条边中的连线数，随机保留一部分作为提示
+        edges = path_edges(paths)
+        for vy in range(1, h):
+            for vx in range(1, w):
+                if rng.random() > 0.3:
+                    continue
+                cnt = sum(e in edges for e in vertex_edges(vx, vy))
+                board.append({"type": "Slitherlink", "x": vx, "y": vy, "data": {"num": cnt}})
+    elif kind == "simpleloop":
+        for path in paths:
+            for x, y in path[1:-1]:
+                if rng.random() < 0.3:
+                    board.append({"type": "Simpleloop", "x": x, "y": y, "data": {}})
+    return board
+
+def generate_yajilin(w, h, seed):
+    """
+    生成一个保证有解的 Yajilin 盘面
+    从一个 2x2 小回路出发，随机把回路上的一条边向外"鼓出"两格来扩大回路；
+    回路约占七成格子；回路外的格子随机涂黑 (互不相邻)，其余作为箭头提示格，数字按该解统计
+    """
+    rng = random.Random(f"yajilin-{w}x{h}-{seed}")
+    x0, y0 = rng.randrange(w - 1), rng.randrange(h - 1)
+    loop = [(x0, y0), (x0 + 1, y0), (x0 + 1, y0 + 1), (x0, y0 + 1)]
+    on_loop = set(loop)
+    for _ in range(20 * w * h):
+        if len(loop) >= 0.7 * w * h:
+            break
+        i = rng.randrange(len(loop))
+        (ax, ay), (bx, by) = loop[i], loop[(i + 1) % len(loop)]
+        px, py = (by - ay, bx - ax) if rng.random() < 0.5 else (ay - by, ax - bx)
+        c, d = (ax + px, ay + py), (bx + px, by + py)
+        if c in on_loop or d in on_loop or not all(0 <= x < w and 0 <= y < h for x, y in (c, d)):
+            continue
+        loop[i + 1:i + 1] = [c, d]
+        on_loop.update((c, d))
+
+    rest = [(x, y) for y in range(h) for x in range(w) if (x, y) not in on_loop]
+    rng.shuffle(rest)
+    shaded = set()
+    for x, y in rest:
+        if rng.random() < 0.7 and not {(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)} & shaded:
+            shaded.add((x, y))
+
+    board = [{"type": "FloorCell", "x": x, "y": y, "data": {}} for y in range(h) for x in range(w)]
+    steps = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+    for ax, ay in sorted(set(rest) - shaded):
+        direction = rng.choice(sorted(steps))
+        dx, dy = steps[direction]
+        x, y, num = ax + dx, ay + dy, 0
+        while 0 <= x < w and 0 <= y < h:
+            num += (x, y) in shaded
+            x, y = x + dx, y + dy
+        board.append({"type": "YajilinArrow", "x": ax, "y": ay, "data": {"num": num, "dir": direction}})
+    return board
+
+def corpus_name(kind, size):
+    return f"{kind}_{size}x{size}.json"
+
+def write_corpus(out_dir, sizes=DEFAULT_SIZES, seed=0):
+    """将语料写入目录，返回文件路径列表"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for kind in KINDS:
+        for size in sizes:
+            p = os.path.join(out_dir, corpus_name(kind, size))
+            with open(p, "w", encoding='utf-8') as f:
+                json.dump(generate_board(kind, size, size, seed), f)
+            paths.append(p)
+    return paths
+
+
+# --- 计时工具 ---
+def _time_call(fn, repeat):
+    """重复执行 fn，返回耗时统计 (秒)。求解器的打印输出被屏蔽"""
+    samples = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+    return {"median": statistics.median(samples), "min": min(samples), "runs": len(samples)}
+
+def bench_solver(boards, solve_sizes, repeat):
+    import solver
+    results = {}
+    for (kind, size), board in boards.items():
+        if size not in solve_sizes:
+            continue
+        tag = f"{kind}/{size}x{size}"
+        results[f"solve/{tag}"] = _time_call(lambda: solver.solve(board), repeat)
+        results[f"unique/{tag}"] = _time_call(lambda: solver.check_unique(board), repeat)
+        results[f"deduct/{tag}"] = _time_call(lambda: solver.deduct(board), repeat)
+    return results
+
+def bench_yajilin(sizes, seed, repeat):
+    """Yajilin 盘面的求解与唯一性检查"""
+    import solver
+    results = {}
+    for size in sizes:
+        board = generate_yajilin(size, size, seed)
+        tag = f"yajilin/{size}x{size}"
+        results[f"solve/{tag}"] = _time_call(lambda: solver.solve(board), repeat)
+        results[f"unique/{tag}"] = _time_call(lambda: solver.check_unique(board), repeat)
+    return results
+
+def bench_fastpath(sizes, seed, repeat):
+    """纯 Numberlink 盘面: 原生搜索快速路径与 Z3 模型的延迟对比"""
+    import solver
+    import numberlink_search
+    results = {}
+    for size in sizes:
+        board = generate_board("numberlink", size, size, seed)
+        tag = f"numberlink/{size}x{size}"
+        hit = numberlink_search.try_solve(board) is not None
+        results[f"fastpath/native/{tag}"] = _time_call(lambda: numberlink_search.try_solve(board), repeat)
+        results[f"fastpath/native/{tag}"]["hit"] = hit
+        results[f"fastpath/z3/{tag}"] = _time_call(lambda: solver.solve(board, fast_path=False), repeat)
+    return results
+
+def bench_io(boards, repeat, tmp_dir):
+    from io_handler import read_map, write_map
+    results = {}
+    os.makedirs(tmp_dir, exist_ok=True)
+    for (kind, size), board in boards.items():
+        tag = f"{kind}/{size}x{size}"
+        p = os.path.join(tmp_dir, corpus_name(kind, size))
+        with open(p, "w", encoding='utf-8') as f:
+            json.dump(board, f)
+        objects = read_map(p)
+        results[f"load/{tag}"] = _time_call(lambda: read_map(p), repeat)
+        results[f"save/{tag}"] = _time_call(lambda: write_map(objects, p), repeat)
+    return results
+
+def bench_edit(sizes, repeat):
+    """区域批量编辑: 填充 / 复制粘贴 / 清除 size x size 的区域"""
+    import actions
+    from history import History
+    from map_objects import FloorCell
+    from board_store import ChunkedBoard
+
+    class _Store:
+        def __init__(self):
+            self.objects = ChunkedBoard()
+            self.history = History()
+
+    results = {}
+    for size in sizes:
+        rect = (0, 0, size - 1, size - 1)
+        store = _Store()
+        results[f"edit/fill/{size}x{size}"] = _time_call(lambda: actions.fill_region(store, rect, FloorCell), repeat)
+        clip = actions.copy_region(store, rect)
+        results[f"edit/paste/{size}x{size}"] = _time_call(lambda: actions.paste_region(store, clip, size, 0), repeat)
+        results[f"edit/clear/{size}x{size}"] = _time_call(lambda: actions.clear_region(store, rect, FloorCell), repeat)
+    return results
+
+def bench_render(boards, frames):
+    """使用 SDL dummy 驱动，测量 render_scene 单帧耗时"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from map_objects import ITEM_REGISTRY
+    from editor import GridEditor
+    import renderer
+
+    editor = GridEditor()
+    name_map = {cls.__name__: cls for cls in ITEM_REGISTRY}
+    results = {}
+    for (kind, size), board in boards.items():
+        editor.objects.replace(name_map[d['type']].from_dict(d) for d in board)
+        renderer.render_scene(editor)  # 预热 (字体缓存等)
+        results[f"render/{kind}/{size}x{size}"] = _time_call(lambda: renderer.render_scene(editor), frames)
+    return results
+
+
+# --- 启动耗时 ---
+# 在子进程中启动编辑器并绘制第一帧，输出从解释器启动到首帧的耗时
+_FIRST_FRAME_SCRIPT = """
+import os, sys, time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import pygame
+from editor import GridEditor
+import renderer
+editor = GridEditor()
+renderer.render_scene(editor)
+pygame.display.flip()
+print("FIRST_FRAME", time.perf_counter(), int("z3" in sys.modules), int("tkinter" in sys.modules), flush=True)
+"""
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 [(模块, 自身耗时 us, 累计耗时 us)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name.strip(), int(self_us), int(cum_us)))
+    return rows
+
+def bench_startup(repeat):
+    """
+    测量编辑器冷启动: 进程启动到首帧的墙钟时间 (含解释器启动)，
+    并返回最后一次运行的 -X importtime 明细
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    walls = []
+    report = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _FIRST_FRAME_SCRIPT],
+                              capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+        wall = time.perf_counter() - t0
+        marker = [l for l in proc.stdout.splitlines() if l.startswith("FIRST_FRAME")]
+        if proc.returncode != 0 or not marker:
+            raise RuntimeError(f"启动子进程失败:\n{proc.stderr[-2000:]}")
+        walls.append(wall)
+        _, _, z3_loaded, tk_loaded = marker[0].split()
+        report = {"imports": parse_importtime(proc.stderr), "z3": z3_loaded == "1", "tkinter": tk_loaded == "1"}
+    report["walls"] = walls
+    results = {"startup/first_frame": {"median": statistics.median(walls), "min": min(walls), "runs": len(walls)}}
+    return results, report
+
+def startup(args):
+    results, report = bench_startup(args.repeat)
+    print(f"{'模块':40s} {'自身 ms':>10s} {'累计 ms':>10s}")
+    for name, self_us, cum_us in sorted(report["imports"], key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{name:40s} {self_us / 1000:10.2f} {cum_us / 1000:10.2f}")
+    print(f"首帧前已加载 z3: {report['z3']}, tkinter: {report['tkinter']}")
+    r = results["startup/first_frame"]
+    print(f"{'startup/first_frame':40s} {r['median'] * 1000:10.2f} ms (min {r['min'] * 1000:.2f})")
+    if args.out:
+        with open(args.out, "w", encoding='utf-8') as f:
+            json.dump({"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                "python": sys.version.split()[0], "platform": platform.platform()},
+                       "results": results}, f, indent=2, sort_keys=True)
+        print(f"结果已写入 {args.out}")
+
+
+# --- 命令 ---
+def run(args):
+    sizes = sorted(set(args.sizes) | set(args.solve_sizes))
+    boards = {(kind, size): generate_board(kind, size, size, args.seed) for kind in KINDS for size in sizes}
+    if args.corpus:
+        for (kind, size) in boards:
+            p = os.path.join(args.corpus, corpus_name(kind, size))
+            if os.path.exists(p):
+                with open(p, "r", encoding='utf-8') as f:
+                    boards[(kind, size)] = json.load(f)
+
+    results = {}
+    if "io" in args.only:
+        results.update(bench_io({k: v for k, v in boards.items() if k[1] in args.sizes}, args.repeat, args.tmp))
+    if "render" in args.only:
+        results.update(bench_render({k: v for k, v in boards.items() if k[1] in args.sizes}, args.frames))
+    if "solver" in args.only:
+        results.update(bench_solver(boards, args.solve_sizes, args.repeat))
+    if "fastpath" in args.only:
+        results.update(bench_fastpath(args.fastpath_sizes, args.seed, args.repeat))
+    if "edit" in args.only:
+        results.update(bench_edit(args.edit_sizes, args.repeat))
+    if "yajilin" in args.only:
+        results.update(bench_yajilin(args.yajilin_sizes, args.seed, args.repeat))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    for key in sorted(results):
+        print(f"{key:40s} {results[key]['median'] * 1000:10.2f} ms")
+    print(f"结果已写入 {args.out}")
+
+def compare(args):
+    """对比两次结果，耗时比超过阈值视为退化 (退出码 1)"""
+    with open(args.baseline, "r", encoding='utf-8') as f:
+        base = json.load(f)["results"]
+    with open(args.current, "r", encoding='utf-8') as f:
+        curr = json.load(f)["results"]
+
+    regressions = 0
+    for key in sorted(set(base) & set(curr)):
+        b, c = base[key]["median"], curr[key]["median"]
+        ratio = c / b if b > 0 else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  <-- 退化"
+            regressions += 1
+        elif ratio < 1 / args.threshold:
+            flag = "  (提升)"
+        print(f"{key:40s} {b * 1000:10.2f} -> {c * 1000:10.2f} ms  x{ratio:5.2f}{flag}")
+    for key in sorted(set(base) ^ set(curr)):
+        print(f"{key:40s} 仅存在于{'基准' if key in base else '当前'}结果")
+    print(f"共 {regressions} 项退化 (阈值 x{args.threshold})")
+    return 1 if regressions else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="link-puzzle-editor 基准测试")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("corpus", help="生成题目语料")
+    p.add_argument("--out", default="bench_corpus")
+    p.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("run", help="运行基准测试")
+    p.add_argument("--out", default="bench_results.json")
+    p.add_argument("--corpus", default=None, help="可选: 从语料目录读取盘面")
+    p.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    p.add_argument("--solve-sizes", type=int, nargs="+", default=DEFAULT_SOLVE_SIZES)
+    p.add_argument("--fastpath-sizes", type=int, nargs="+", default=DEFAULT_FASTPATH_SIZES)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--frames", type=int, default=30)
+    p.add_argument("--edit-sizes", type=int, nargs="+", default=DEFAULT_EDIT_SIZES)
+    p.add_argument("--yajilin-sizes", type=int, nargs="+", default=DEFAULT_YAJILIN_SIZES)
+    p.add_argument("--only", nargs="+", default=["solver", "io", "render", "fastpath", "edit", "yajilin"],
+                   choices=["solver", "io", "render", "fastpath", "edit", "yajilin"])
+    p.add_argument("--tmp", default=os.path.join("bench_corpus", "_tmp"))
+
+    p = sub.add_parser("compare", help="与基准结果对比")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=1.2)
+
+    p = sub.add_parser("startup", help="测量编辑器启动到首帧的耗时及导入明细")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--top", type=int, default=20, help="显示累计耗时最多的前 N 个模块")
+    p.add_argument("--out", default=None, help="可选: 写入结果 JSON (可用 compare 对比)")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "corpus":
+        for p in write_corpus(args.out, args.sizes, args.seed):
+            print(p)
+    elif args.cmd == "run":
+        run(args)
+    elif args.cmd == "compare":
+        return compare(args)
+    elif args.cmd == "startup":
+        startup(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,338 @@
+# board_store.py
+"""
+分块存放的盘面
+物品按所在格子 (gx, gy) 归入 CHUNK_SIZE x CHUNK_SIZE 的块，每块内按 z_index 有序。
+渲染与编辑只按格子或矩形范围查询，只会读入涉及的块；内存中的块超过 max_chunks 时按 LRU 换出:
+未修改的块直接丢弃 (需要时从画布目录重新读取)，修改过的块写入临时交换目录，保存时才写进画布目录。
+
+画布目录格式:
+    index.json         {"chunk_size": 64, "chunks": [[cx, cy, 物品数], ...]}
+    c_<cx>_<cy>.json   该块的物品字典列表 (与单文件存档中的格式相同)
+保存时只写修改过的块。
+
+撤销记录直接引用物品对象；块被换出后再读入会得到新的对象，因此删除与取回物品时
+除按对象身份匹配外，也按 (格子, 层级, 类型) 匹配 (同一格同一层级最多只有一个物品，
+撤销记录按顺序重放，该位置上的物品必然就是记录中的那一个)。
+"""
+import os
+import json
+import heapq
+import shutil
+import bisect
+import weakref
+import tempfile
+from collections import OrderedDict, defaultdict
+from operator import attrgetter
+
+from config import CHUNK_SIZE, CHUNK_CACHE_SIZE
+from map_objects import ITEM_REGISTRY
+
+_z_key = attrgetter('z_index')
+INDEX_FILE = "index.json"
+
+
+def _slot(obj):
+    return obj.gx, obj.gy, obj.layer_id, type(obj)
+
+
+class ChunkedBoard:
+    def __init__(self, chunk_size=CHUNK_SIZE, max_chunks=CHUNK_CACHE_SIZE):
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # (cx, cy) -> [物品...]，按访问先后排列 (LRU)
+        self.counts = {}             # (cx, cy) -> 物品数，包括未读入内存的块
+        self.dirty = set()           # 修改后尚未保存的块
+        self.swapped = set()         # 已换出到交换目录的脏块
+        self.directory = None        # 绑定的画布目录 (保存的目标)
+        self.source = None           # 未修改的块从哪个目录读取 (解除绑定后仍是原目录)
+        self._swap_dir = None
+        self._swap_cleanup = None
+        self._name_map = {cls.__name__: cls for cls in ITEM_REGISTRY}
+
+    # --- 块管理 ---
+    def chunk_key(self, gx, gy):
+        return gx // self.chunk_size, gy // self.chunk_size
+
+    def _chunk(self, key, create=False):
+        """取出一个块 (必要时从磁盘读入)；块不存在且 create 为 False 时返回 None"""
+        objs = self.chunks.get(key)
+        if objs is not None:
+            self.chunks.move_to_end(key)
+            return objs
+        if key in self.counts:
+            objs = self._read_chunk(key)
+        elif create:
+            objs = []
+            self.counts[key] = 0
+        else:
+            return None
+        self.chunks[key] = objs
+        self._evict()
+        return objs
+
+    def _evict(self):
+        """内存中的块超过上限时换出最久未访问的块 (刚访问的块在末尾，不会被换出)"""
+        while len(self.chunks) > self.max_chunks:
+            key, objs = self.chunks.popitem(last=False)
+            if key in self.dirty:
+                self._write_chunk(self._swap_path(key), objs)
+                self.swapped.add(key)
+
+    def _changed(self, key, objs):
+        self.counts[key] = len(objs)
+        self.dirty.add(key)
+
+    def _keys_in_rect(self, x0, y0, x1, y1):
+        (cx0, cy0), (cx1, cy1) = self.chunk_key(x0, y0), self.chunk_key(x1, y1)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.counts):
+            return [k for k in self.counts if cx0 <= k[0] <= cx1 and cy0 <= k[1] <= cy1]
+        return [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1) if (cx, cy) in self.counts]
+
+    # --- 查询 ---
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def __iter__(self):
+        """遍历全部物品 (逐块读入，块之间不保证 z_index 顺序)"""
+        for key in list(self.counts):
+            objs = self._chunk(key)
+            if objs:
+                yield from list(objs)
+
+    def at(self, gx, gy):
+        """格子 (gx, gy) 上的物品，按 z_index 从低到高"""
+        objs = self._chunk(self.chunk_key(gx, gy))
+        if not objs:
+            return []
+        return [o for o in objs if o.gx == gx and o.gy == gy]
+
+    def find(self, gx, gy, layer_id):
+        """格子 (gx, gy) 上指定层级的物品，没有时返回 None"""
+        for o in self.at(gx, gy):
+            if o.layer_id == layer_id:
+                return o
+        return None
+
+    def in_rect(self, x0, y0, x1, y1):
+        """坐标落在矩形内 (两端包含) 的物品，按 z_index 有序"""
+        cs = self.chunk_size
+        runs = []
+        for key in self._keys_in_rect(x0, y0, x1, y1):
+            objs = self._chunk(key)
+            if not objs:
+                continue
+            kx, ky = key[0] * cs, key[1] * cs
+            if x0 <= kx and kx + cs - 1 <= x1 and y0 <= ky and ky + cs - 1 <= y1:
+                runs.append(objs)
+            else:
+                runs.append([o for o in objs if x0 <= o.gx <= x1 and y0 <= o.gy <= y1])
+        if len(runs) == 1:
+            return list(runs[0])
+        # 各块内已按 z_index 有序，多路归并即可
+        return list(heapq.merge(*runs, key=_z_key))
+
+    def resolve(self, obj):
+        """取回盘面上与 obj 对应的物品 (块被换出重读后对象会变化)，没有时返回 None"""
+        gx, gy, layer_id, cls = _slot(obj)
+        fallback = None
+        for o in self.at(gx, gy):
+            if o is obj:
+                return o
+            if o.layer_id == layer_id and type(o) is cls:
+                fallback = o
+        return fallback
+
+    # --- 修改 ---
+    def add(self, obj):
+        key = self.chunk_key(obj.gx, obj.gy)
+        objs = self._chunk(key, create=True)
+        bisect.insort_right(objs, obj, key=_z_key)
+        self._changed(key, objs)
+
+    def add_many(self, new_objs):
+        by_chunk = defaultdict(list)
+        for obj in new_objs:
+            by_chunk[self.chunk_key(obj.gx, obj.gy)].append(obj)
+        for key, group in by_chunk.items():
+            objs = self._chunk(key, create=True)
+            objs.extend(group)
+            objs.sort(key=_z_key)  # 两段各自有序，timsort 只做一次归并
+            self._changed(key, objs)
+
+    def remove_many(self, targets):
+        """删除指定物品，返回实际删除的物品列表"""
+        by_chunk = defaultdict(list)
+        for obj in targets:
+            by_chunk[self.chunk_key(obj.gx, obj.gy)].append(obj)
+        removed = []
+        for key, group in by_chunk.items():
+            objs = self._chunk(key)
+            if not objs:
+                continue
+            # 块换出后重读的物品与记录中的不是同一个对象，按位置匹配
+            slots = {_slot(o) for o in group}
+            kept = []
+            for o in objs:
+                if _slot(o) in slots:
+                    removed.append(o)
+                else:
+                    kept.append(o)
+            if len(kept) != len(objs):
+                objs[:] = kept
+                self._changed(key, objs)
+        return removed
+
+    def remove_where(self, predicate, rect=None):
+        """删除满足条件的物品 (rect 给定时只检查该范围内的块)，返回删除的物品列表"""
+        keys = list(self.counts) if rect is None else self._keys_in_rect(*rect)
+        removed = []
+        for key in keys:
+            objs = self._chunk(key)
+            if not objs:
+                continue
+            kept = []
+            for o in objs:
+                (removed if predicate(o) else kept).append(o)
+            if len(kept) != len(objs):
+                objs[:] = kept
+                self._changed(key, objs)
+        return removed
+
+    def replace_layers(self, new_objs):
+        """
+        放置一批物品，替换同一格子同一层级上的已有物品 (同一批中后放的覆盖先放的)
+        返回 (实际放置的物品, 被替换的物品)
+        """
+        batch = {}
+        for obj in new_objs:
+            batch[(obj.gx, obj.gy, obj.layer_id)] = obj
+        by_chunk = defaultdict(list)
+        for obj in batch.values():
+            by_chunk[self.chunk_key(obj.gx, obj.gy)].append(obj)
+        removed = []
+        for key, group in by_chunk.items():
+            objs = self._chunk(key, create=True)
+            kept = []
+            for o in objs:
+                (removed if (o.gx, o.gy, o.layer_id) in batch else kept).append(o)
+            kept.extend(sorted(group, key=_z_key))
+            kept.sort(key=_z_key)
+            objs[:] = kept
+            self._changed(key, objs)
+        return list(batch.values()), removed
+
+    def replace(self, new_objs):
+        """用新的物品替换整个盘面，返回原有的全部物品"""
+        removed = list(self)
+        self.clear()
+        self.add_many(new_objs)
+        return removed
+
+    def mark_dirty(self, obj):
+        """物品的属性被原地修改后调用"""
+        key = self.chunk_key(obj.gx, obj.gy)
+        if key in self.counts:
+            self.dirty.add(key)
+
+    def clear(self):
+        """清空盘面；绑定目录时各块在保存时删除"""
+        for key in self.counts:
+            self.counts[key] = 0
+            self.dirty.add(key)
+        self.chunks.clear()
+        self.swapped.clear()
+
+    # --- 读写 ---
+    def _swap_path(self, key):
+        if self._swap_dir is None:
+            self._swap_dir = tempfile.mkdtemp(prefix="board_swap_")
+            # 未保存就退出时也删除交换目录
+            self._swap_cleanup = weakref.finalize(self, shutil.rmtree, self._swap_dir, True)
+        return os.path.join(self._swap_dir, f"c_{key[0]}_{key[1]}.json")
+
+    def _chunk_path(self, directory, key):
+        return os.path.join(directory, f"c_{key[0]}_{key[1]}.json")
+
+    def _write_chunk(self, path, objs):
+        with open(path, "w", encoding='utf-8') as f:
+            json.dump([o.to_dict() for o in objs], f)
+
+    def _read_chunk(self, key):
+        if not self.counts.get(key):
+            return []
+        if key in self.swapped:
+            path = self._swap_path(key)
+        elif self.source is not None:
+            path = self._chunk_path(self.source, key)
+        else:
+            return []
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding='utf-8') as f:
+            data = json.load(f)
+        objs = [self._name_map[d['type']].from_dict(d) for d in data if d['type'] in self._name_map]
+        objs.sort(key=_z_key)
+        return objs
+
+    def open(self, directory):
+        """绑定并打开一个画布目录 (只读入索引，块在用到时才读取)"""
+        with open(os.path.join(directory, INDEX_FILE), "r", encoding='utf-8') as f:
+            index = json.load(f)
+        self.discard_swap()
+        self.chunk_size = index.get("chunk_size", self.chunk_size)
+        self.chunks.clear()
+        self.dirty.clear()
+        self.counts = {(cx, cy): n for cx, cy, n in index["chunks"]}
+        self.directory = self.source = directory
+
+    def unbind(self):
+        """
+        解除与画布目录的绑定 (如导入了其他存档)，之后保存时需要重新指定目录
+        未修改的块仍从原目录读取，但全部视为已修改，保存时完整写入新目录
+        """
+        self.directory = None
+        self.dirty.update(self.counts)
+
+    def save(self, directory=None):
+        """
+        保存到画布目录 (默认为已绑定的目录)，返回写入的块数
+        保存到原目录时只写修改过的块；另存为新目录时未修改的块直接复制文件
+        """
+        directory = directory or self.directory
+        if directory is None:
+            raise ValueError("未指定画布目录")
+        os.makedirs(directory, exist_ok=True)
+        moving = self.source is not None and os.path.abspath(directory) != os.path.abspath(self.source)
+        written = 0
+        for key in list(self.counts):
+            path = self._chunk_path(directory, key)
+            if key in self.dirty or self.source is None:
+                if key in self.chunks:
+                    objs = self.chunks[key]
+                else:
+                    objs = self._read_chunk(key)
+                if objs:
+                    self._write_chunk(path, objs)
+                elif os.path.exists(path):
+                    os.remove(path)
+                written += 1
+            elif moving:
+                shutil.copyfile(self._chunk_path(self.source, key), path)
+        # 空块不再保留
+        for key in [k for k, n in self.counts.items() if n == 0]:
+            del self.counts[key]
+            self.chunks.pop(key, None)
+        index = {"chunk_size": self.chunk_size, "chunks": [[cx, cy, n] for (cx, cy), n in sorted(self.counts.items())]}
+        with open(os.path.join(directory, INDEX_FILE), "w", encoding='utf-8') as f:
+            json.dump(index, f)
+        self.directory = self.source = directory
+        self.discard_swap()
+        self.dirty.clear()
+        return written
+
+    def discard_swap(self):
+        """删除交换目录 (其中的块已保存或不再需要)"""
+        if self._swap_dir is not None:
+            self._swap_cleanup()
+            self._swap_dir = None
+        self.swapped.clear()
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+盘面规范化
+同一道题平移、旋转或镜像后应得到相同的哈希，供求解缓存与题目日志作为键使用。
+
+做法: 所有物品换算到倍坐标 (格子 (2x, 2y)，格点 (2x-1, 2y-1)，右边 (2x+1, 2y)，下边 (2x, 2y+1))，
+对 8 种二面体变换分别平移到原点附近，Numberlink 端点编号按位置顺序重新编号，
+取序列化结果最小的一种作为规范形式。求解结果可以用 to_original 映射回原盘面的坐标与朝向。
+"""
+import json
+import hashlib
+
+# 各类型物品的位置种类 (与 map_objects 中的 placement_type 一致，这里不导入 pygame)
+_PLACEMENT = {"Slitherlink": "vertex", "Solve_mode": "edge"}
+# 编号只是配对标签、可以任意重排的类型
+_RELABEL_TYPES = {"EndPoint"}
+# data['dir'] 表示朝向、需要随盘面一起旋转的类型 (Solve_mode 的 dir 由边的位置决定)
+_DIRECTED_TYPES = {"YajilinArrow"}
+# 箭头方向对应的单位向量
+_DIR_VECTORS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+_VECTOR_DIRS = {v: k for k, v in _DIR_VECTORS.items()}
+
+# 8 种二面体变换: (是否交换 x/y, x 符号, y 符号)，先交换再取符号
+TRANSFORMS = [(swap, sx, sy) for swap in (False, True) for sx in (1, -1) for sy in (1, -1)]
+
+
+def _to_doubled(obj):
+    x, y = obj['x'], obj['y']
+    kind = _PLACEMENT.get(obj['type'], "cell")
+    if kind == "vertex":
+        return 2 * x - 1, 2 * y - 1
+    if kind == "edge":
+        if obj.get('data', {}).get('dir', 'right') == 'down':
+            return 2 * x, 2 * y + 1
+        return 2 * x + 1, 2 * y
+    return 2 * x, 2 * y
+
+def _from_doubled(t, X, Y, data):
+    """倍坐标换算回 (x, y)；边的方向由奇偶性决定并写回 data"""
+    kind = _PLACEMENT.get(t, "cell")
+    if kind == "vertex":
+        return (X + 1) // 2, (Y + 1) // 2, data
+    if kind == "edge":
+        if X % 2:
+            return (X - 1) // 2, Y // 2, dict(data, dir='right')
+        return X // 2, (Y - 1) // 2, dict(data, dir='down')
+    return X // 2, Y // 2, data
+
+def _apply(transform, X, Y):
+    swap, sx, sy = transform
+    if swap:
+        X, Y = Y, X
+    return sx * X, sy * Y
+
+def _invert(transform, X, Y):
+    swap, sx, sy = transform
+    X, Y = sx * X, sy * Y
+    return (Y, X) if swap else (X, Y)
+
+def _map_data(transform, t, data, inverse=False):
+    """变换 data 中与朝向有关的字段 (Yajilin 箭头方向)"""
+    d = data.get('dir')
+    if t not in _DIRECTED_TYPES or d not in _DIR_VECTORS:
+        return data
+    fn = _invert if inverse else _apply
+    return dict(data, dir=_VECTOR_DIRS[fn(transform, *_DIR_VECTORS[d])])
+
+
+class CanonicalBoard:
+    """
+    一个盘面的规范形式
+    items: 规范坐标系下的物品字典列表 (已排序)；key: 规范形式的哈希
+    """
+    def __init__(self, items, transform, offset, labels):
+        self.items = items
+        self.transform = transform
+        self.offset = offset  # 变换后再减去的倍坐标平移量 (均为偶数)
+        self.labels = labels  # 原编号 -> 规范编号
+        self._inverse_labels = {v: k for k, v in labels.items()}
+        self.key = hashlib.sha1(json.dumps(items, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _label(self, num, table):
+        """表中没有的编号 (如旧盘面中已删除的端点) 映射到不会与已有编号冲突的值"""
+        if num in table:
+            return table[num]
+        return len(self.labels) + 1 + num
+
+    def to_canonical(self, objects):
+        """原坐标系下的物品字典 (如求解结果、增量推理记录) 换算到规范坐标系"""
+        ox, oy = self.offset
+        out = []
+        for obj in objects:
+            X, Y = _apply(self.transform, *_to_doubled(obj))
+            data = _map_data(self.transform, obj['type'], obj.get('data', {}))
+            if obj['type'] in _RELABEL_TYPES and 'num' in data:
+                data = dict(data, num=self._label(data['num'], self.labels))
+            x, y, data = _from_doubled(obj['type'], X - ox, Y - oy, data)
+            out.append({"type": obj['type'], "x": x, "y": y, "data": data})
+        return out
+
+    def to_original(self, objects):
+        """规范坐标系下的物品字典换算回原盘面的坐标、朝向与编号"""
+        ox, oy = self.offset
+        out = []
+        for obj in objects:
+            X, Y = _to_doubled(obj)
+            X, Y = _invert(self.transform, X + ox, Y + oy)
+            data = _map_data(self.transform, obj['type'], obj.get('data', {}), inverse=True)
+            if obj['type'] in _RELABEL_TYPES and 'num' in data:
+                data = dict(data, num=self._label(data['num'], self._inverse_labels))
+            x, y, data = _from_doubled(obj['type'], X, Y, data)
+            out.append({"type": obj['type'], "x": x, "y": y, "data": data})
+        return out
+
+    def cell_to_canonical(self, cell):
+        """格子坐标 (如 HINT 的 focus) 换算到规范坐标系"""
+        X, Y = _apply(self.transform, 2 * cell[0], 2 * cell[1])
+        return (X - self.offset[0]) // 2, (Y - self.offset[1]) // 2
+
+
+def _candidate(board, doubled, transform):
+    """按一种变换生成候选: 返回 (排序键, 物品列表, 平移量, 编号表)"""
+    points = [_apply(transform, X, Y) for X, Y in doubled]
+    # 平移量取偶数，保持格子 / 格点 / 边的奇偶性不变
+    ox = min(X for X, _ in points) if points else 0
+    oy = min(Y for _, Y in points) if points else 0
+    ox, oy = ox - ox % 2, oy - oy % 2
+
+    entries = []
+    for obj, (X, Y) in zip(board, points):
+        entries.append((Y - oy, X - ox, obj['type'], _map_data(transform, obj['type'], obj.get('data', {}))))
+    # 同一位置同一类型通常只有一个物品，以 data 兜底保证顺序确定 (端点编号不参与)
+    entries.sort(key=lambda e: (e[0], e[1], e[2], "" if e[2] in _RELABEL_TYPES else json.dumps(e[3], sort_keys=True)))
+
+    # 端点编号按规范位置上首次出现的顺序重新编号
+    labels = {}
+    for _, _, t, data in entries:
+        if t in _RELABEL_TYPES and 'num' in data and data['num'] not in labels:
+            labels[data['num']] = len(labels) + 1
+
+    items, sort_key = [], []
+    for Y, X, t, data in entries:
+        if t in _RELABEL_TYPES and 'num' in data:
+            data = dict(data, num=labels[data['num']])
+        x, y, data = _from_doubled(t, X, Y, data)
+        items.append({"type": t, "x": x, "y": y, "data": data})
+        sort_key.append((Y, X, t, json.dumps(data, sort_keys=True)))
+    return sort_key, items, (ox, oy), labels
+
+
+def canonicalize(board):
+    """计算盘面 (to_dict 字典列表) 的规范形式"""
+    doubled = [_to_doubled(obj) for obj in board]
+    best = None
+    for transform in TRANSFORMS:
+        sort_key, items, offset, labels = _candidate(board, doubled, transform)
+        if best is None or sort_key < best[0]:
+            best = (sort_key, items, transform, offset, labels)
+    _, items, transform, offset, labels = best
+    return CanonicalBoard(items, transform, offset, labels)
+
+def canonical_hash(board):
+    """与平移、旋转、镜像及端点编号无关的盘面哈希"""
+    return canonicalize(board).key
\ No newline at end of file
@@ -14,8 +14,32 @@ BG_COLOR = (30, 30, 60)         # 背景深蓝
 CELL_COLOR = (240, 240, 240)    # 格子填充色
 HOVER_COLOR = (200, 200, 200)   # 鼠标悬停高亮
 TEXT_COLOR = (255, 255, 255)    # 文字颜色
+SELECT_COLOR = (0, 120, 215, 50)  # 选区填充 (半透明)
+SELECT_BORDER = (0, 120, 215)     # 选区边框
+ISSUE_COLOR = (230, 40, 40)       # 静态检查问题格的边框
 
 # 按钮颜色
 BTN_COLOR = (60, 60, 60)
 BTN_ACTIVE = (0, 120, 215)
-BTN_HOVER = (80, 80, 80)
\ No newline at end of file
+BTN_HOVER = (80, 80, 80)
+
+# 求解器
+SOLVER_PORTFOLIO = False              # 是否并行运行多种编码/配置 (portfolio)
+PORTFOLIO_LOG = "portfolio_log.jsonl"  # 记录每题胜出配置的日志文件
+SOLVER_MERGE_CONFLICT = "keep"        # 求解结果与盘面已有标记冲突时: "keep" 保留已有标记 / "replace" 以求解结果为准
+SOLVER_SERVER_URL = None              # 本地求解服务地址 (如 "http://127.0.0.1:8765")，None 表示每次启动独立求解进程
+ENUMERATE_LIMIT = 1000                # 枚举所有解时最多保留的解数
+ENUMERATE_TIME_LIMIT = 60             # 枚举所有解的总时限 (秒)
+SOLUTION_COLOR = (0, 200, 120, 170)   # 查看枚举结果时叠加显示的连线颜色 (半透明)
+
+# 分块存储
+CHUNK_SIZE = 64          # 每块的边长 (格)
+CHUNK_CACHE_SIZE = 64    # 内存中最多保留的块数 (约 512x512 格)，超出时按 LRU 换出
+
+# 撤销 / 重做
+HISTORY_MAX_ENTRIES = 200000  # 撤销栈最多引用的物品条目数 (超出时丢弃最早的步骤)
+HISTORY_MAX_STEPS = 500       # 撤销栈最多保存的步骤数
+
+# 性能分析
+PROFILER_TRACE_FRAMES = 300    # F4 每次录制的帧数
+PROFILER_TRACE_DIR = "traces"  # trace 文件输出目录
\ No newline at end of file
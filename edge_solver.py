@@ -0,0 +1,222 @@
+"""
+纯布尔边编码求解器
+每条相邻 FloorCell 之间的边对应一个 Bool 变量，以度数约束建模；
+同号端点相连由按位编码的颜色变量保证，无环条件通过惰性割平面逐步补充。
+语义与 solver._build_model 保持一致，供求解组合 (portfolio) 使用。
+"""
+from collections import defaultdict
+from z3 import Bool, Solver, SolverFor, And, Or, Not, Implies, AtMost, PbEq, sat
+
+
+def _build_edge_model(problem_data, seed=None, logic=None):
+    """构建边编码模型，返回上下文；盘面显然无解时返回 {"unsat": True}"""
+    objects = problem_data
+    if not objects:
+        return None
+    if any(obj['type'] == 'YajilinArrow' for obj in objects):
+        raise ValueError("边编码不支持 Yajilin 盘面")
+
+    floor_cells = set()
+    endpoints = {}
+    number_to_points = defaultdict(list)
+    simpleloops = []
+    slitherlinks = []
+    marks = []
+    for obj in objects:
+        pos = (obj['x'], obj['y'])
+        t = obj['type']
+        if t == 'FloorCell':
+            floor_cells.add(pos)
+        elif t == 'EndPoint':
+            floor_cells.add(pos)
+            num = obj.get('data', {}).get('num', 1)
+            endpoints[pos] = num
+            number_to_points[num].append(pos)
+        elif t == 'Simpleloop':
+            simpleloops.append(pos)
+        elif t == 'Slitherlink':
+            slitherlinks.append(obj)
+        elif t == 'Solve_mode':
+            marks.append(obj)
+
+    s = SolverFor(logic) if logic else Solver()
+    if seed is not None:
+        s.set("random_seed", seed)
+
+    # 1. 边变量: 只有两侧都是 FloorCell 的边才可能有线
+    edges = {}
+    for (x, y) in floor_cells:
+        if (x + 1, y) in floor_cells:
+            edges[(x, y, 'right')] = Bool(f"e_{x}_{y}_r")
+        if (x, y + 1) in floor_cells:
+            edges[(x, y, 'down')] = Bool(f"e_{x}_{y}_d")
+
+    incident = defaultdict(list)
+    for (x, y, d), v in edges.items():
+        incident[(x, y)].append(v)
+        incident[(x + 1, y) if d == 'right' else (x, y + 1)].append(v)
+
+    # 2. 度数约束: 端点恰为 1，其余格子为 0 或 2
+    for pos in floor_cells:
+        vs = incident[pos]
+        if pos in endpoints:
+            if not vs:
+                return {"unsat": True}
+            s.add(PbEq([(v, 1) for v in vs], 1))
+        elif vs:
+            s.add(AtMost(*vs, 2))
+            s.add(Not(PbEq([(v, 1) for v in vs], 1)))
+
+    # 3. 已有线条/叉
+    for obj in marks:
+        d = obj.get('data', {})
+        key = (obj['x'], obj['y'], d.get('dir', 'right'))
+        if key[2] not in ('right', 'down'):
+            continue
+        v = edges.get(key)
+        if d.get('style', 'line') == 'line':
+            if v is None:
+                return {"unsat": True}  # 连线通向非地板格
+            s.add(v)
+        elif v is not None:
+            s.add(Not(v))
+
+    # 4. Simpleloop: 必须有线经过 (端点本身也算)
+    for pos in simpleloops:
+        if pos in endpoints:
+            continue
+        if pos not in floor_cells or not incident[pos]:
+            return {"unsat": True}
+        s.add(Or(incident[pos]))
+
+    # 5. Slitherlink: 格点周围的连线数
+    for obj in slitherlinks:
+        gx, gy = obj['x'], obj['y']
+        target_num = obj['data'].get('num', 0)
+        keys = [(gx - 1, gy - 1, 'right'), (gx - 1, gy - 1, 'down'),
+                (gx - 1, gy, 'right'), (gx, gy - 1, 'down')]
+        terms = [(edges[k], 1) for k in keys if k in edges]
+        if target_num > len(terms):
+            return {"unsat": True}
+        if terms:
+            s.add(PbEq(terms, target_num))
+
+    # 6. 颜色位: 每格用若干 Bool 位编码所属路径编号，连线两侧颜色相同。
+    #    只有恰好出现两次的数字才要求互相连通 (与 grilops 模型一致)，
+    #    其余端点共用颜色 0，可任意相连。
+    partner = {}
+    color = {}
+    for num, pts in number_to_points.items():
+        if len(pts) == 2:
+            partner[pts[0]], partner[pts[1]] = pts[1], pts[0]
+            color[pts[0]] = color[pts[1]] = len(color) // 2 + 1
+    nbits = (len(color) // 2).bit_length()
+    bits = {pos: [Bool(f"c_{pos[0]}_{pos[1]}_{b}") for b in range(nbits)] for pos in floor_cells}
+    for pos, num in endpoints.items():
+        c = color.get(pos, 0)
+        for b, v in enumerate(bits[pos]):
+            s.add(v if (c >> b) & 1 else Not(v))
+    for (x, y, d), v in edges.items():
+        other = (x + 1, y) if d == 'right' else (x, y + 1)
+        for b1, b2 in zip(bits[(x, y)], bits[other]):
+            s.add(Implies(v, b1 == b2))
+
+    # 7. 预先排除最常见的 2x2 小环
+    for (x, y) in floor_cells:
+        square = [(x, y, 'right'), (x, y, 'down'), (x + 1, y, 'down'), (x, y + 1, 'right')]
+        if all(k in edges for k in square):
+            s.add(Not(And([edges[k] for k in square])))
+
+    return {
+        "solver": s,
+        "edges": edges,
+        "endpoints": endpoints,
+        "partner": partner,
+    }
+
+
+def _find_violation(ctx, model):
+    """检查模型的连通性，返回需要禁止的边变量列表；合法时返回 None"""
+    on = {k for k, v in ctx["edges"].items() if model.eval(v, model_completion=True)}
+    adj = defaultdict(list)
+    for (x, y, d) in on:
+        other = (x + 1, y) if d == 'right' else (x, y + 1)
+        adj[(x, y)].append((other, (x, y, d)))
+        adj[other].append(((x, y), (x, y, d)))
+
+    seen = set()
+    endpoints, partner = ctx["endpoints"], ctx["partner"]
+    # 1. 从端点出发追踪路径，检查是否连到正确的另一端
+    for start in endpoints:
+        if start in seen or not adj[start]:
+            continue
+        path_edges = []
+        prev, cur = None, start
+        seen.add(start)
+        while True:
+            nxt = [(n, k) for n, k in adj[cur] if n != prev]
+            if not nxt:
+                break
+            prev, (cur, k) = cur, nxt[0]
+            path_edges.append(k)
+            seen.add(cur)
+        if start in partner and partner[start] != cur or cur in partner and partner[cur] != start:
+            return path_edges
+
+    # 2. 剩下的有线格子只可能构成环
+    for pos in adj:
+        if pos in seen:
+            continue
+        cycle = set()
+        stack = [pos]
+        seen.add(pos)
+        while stack:
+            c = stack.pop()
+            for n, k in adj[c]:
+                cycle.add(k)
+                if n not in seen:
+                    seen.add(n)
+                    stack.append(n)
+        return list(cycle)
+    return None
+
+
+def _solve_ctx(ctx):
+    """带惰性割平面的求解，返回合法模型或 None"""
+    s = ctx["solver"]
+    while s.check() == sat:
+        model = s.model()
+        bad = _find_violation(ctx, model)
+        if bad is None:
+            return model
+        s.add(Or([Not(ctx["edges"][k]) for k in bad]))
+    return None
+
+
+def _model_to_objects(ctx, model):
+    return [
+        {"type": "Solve_mode", "x": x, "y": y, "data": {"dir": d, "style": "line"}}
+        for (x, y, d), v in sorted(ctx["edges"].items())
+        if model.eval(v, model_completion=True)
+    ]
+
+
+def solve(problem_data, seed=None, logic=None):
+    """求解并返回 Solve_mode 连线字典列表；无解返回 []"""
+    ctx = _build_edge_model(problem_data, seed, logic)
+    if not ctx or ctx.get("unsat"):
+        return []
+    model = _solve_ctx(ctx)
+    return _model_to_objects(ctx, model) if model is not None else []
+
+
+def check_unique(problem_data, seed=None, logic=None):
+    """返回 True(唯一解) / False(多解) / None(无解或空盘面)"""
+    ctx = _build_edge_model(problem_data, seed, logic)
+    if not ctx or ctx.get("unsat"):
+        return None
+    model = _solve_ctx(ctx)
+    if model is None:
+        return None
+    ctx["solver"].add(Or([v != model.eval(v, model_completion=True) for v in ctx["edges"].values()]))
+    return _solve_ctx(ctx) is None
\ No newline at end of file
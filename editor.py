@@ -2,15 +2,22 @@
 import pygame
 import sys
 import time
+import copy
+import atexit
+import threading
+from queue import Empty
 import multiprocessing
-import tkinter as tk
-import tkinter.ttk as ttk
 
 from config import *
-from ui import Button
+from ui import Button, get_tk_root
 from map_objects import ITEM_REGISTRY, Solve_mode
-from worker import solver_worker
-from io_handler import save_map_to_json, load_map_from_json
+from shm_board import BoardChannel
+from history import History
+from profiler import FrameProfiler
+from io_handler import save_map_to_json, load_map_from_json, save_canvas_dir, open_canvas_dir
+from board_store import ChunkedBoard
+from feasibility import check_board
+from propagate import propagate, forced_marks
 
 import actions
 import renderer
@@ -26,7 +33,7 @@ class GridEditor:
         self.font = pygame.font.Font(f_path, 16) if f_path else pygame.font.SysFont('arial', 16)
 
         # 核心状态数据
-        self.objects = [] 
+        self.objects = ChunkedBoard()  # 分块存放，按视野读入 / 换出
         self.cam_x, self.cam_y = 50, 50
         
         # 交互状态
@@ -41,6 +48,24 @@ class GridEditor:
         self.edge_op_mode = None    
         self.message = ""
         self.msg_timer = 0
+        self.deduct_record = None  # 上次推理的盘面与结论，供增量推理复用
+        self._standby = None       # 待命的求解进程 (进程, 任务队列, 结果队列)，见 prewarm_solver
+        self._prewarming = False
+        self.solver_failed = False # 上次求解是否因出错而没有结果 (区别于用户中止)
+        # 待命进程不是守护进程 (portfolio 模式需要在其中再启动子进程)，退出时需手动结束
+        atexit.register(self.shutdown_solver)
+        self.history = History()   # 撤销 / 重做记录
+        self.profiler = FrameProfiler()
+
+        # 区域选择 (Shift + 左键拖拽)
+        self.selection = None      # (x0, y0, x1, y1)，两端包含
+        self.select_anchor = None  # 正在框选时的起点格子
+        self.clipboard = []
+
+        # 枚举得到的解 ([ / ] 切换，Enter 应用到盘面，Esc 关闭)
+        self.solutions = []
+        self.solution_idx = 0
+        self.issues = []           # 静态检查发现的问题 (相关格子标红，Esc 清除)
         
         self.buttons = []
         self.setup_ui()
@@ -52,7 +77,7 @@ class GridEditor:
             self.buttons.append(Button(x, y, w, h, cls.name, self.font, idx))
             y += h + gap
         # 功能按钮
-        funcs = [("清空", "WIPE"), ("!重置", "CLEAR"), ("LOAD", "IMPORT"), ("SAVE", "EXPORT"), ("SOLVE_ONE", "SOLVE"), ("DEDUCT", "DEDUCT")]
+        funcs = [("清空", "WIPE"), ("!重置", "CLEAR"), ("LOAD", "IMPORT"), ("SAVE", "EXPORT"), ("SOLVE_ONE", "SOLVE"), ("DEDUCT", "DEDUCT"), ("HINT", "HINT"), ("EASY", "PROPAGATE"), ("ALL_SOL", "ENUMERATE")]
         for text, action in funcs:
             self.buttons.append(Button(x, y, w, h, text, self.font, action))
             y += h + gap
@@ -73,14 +98,103 @@ class GridEditor:
         self.msg_timer = time.time() + 2
 
     # --- 异步求解逻辑 (Solver Control) ---
-    def run_async_solver(self, mode):
-        current_data = [obj.to_dict() for obj in self.objects]
-        queue = multiprocessing.Queue()
-        process = multiprocessing.Process(target=solver_worker, args=(mode, current_data, queue))
-        process.start()
+    def prewarm_solver(self):
+        """
+        在后台线程中启动一个待命的求解进程 (启动时即导入 z3 / grilops)
+        下次求解直接把任务交给它，不必等待进程启动与模块导入；每个待命进程只执行一个任务
+        """
+        if self._prewarming or self._standby is not None:
+            return
+        self._prewarming = True
+        def load():
+            try:
+                from worker import standby_worker
+                jobs, results = multiprocessing.Queue(), multiprocessing.Queue()
+                process = multiprocessing.Process(target=standby_worker, args=(jobs, results))
+                process.start()
+                self._standby = (process, jobs, results)
+            except Exception as e:
+                print(f"启动待命求解进程失败: {e}")
+            finally:
+                self._prewarming = False
+        threading.Thread(target=load, daemon=True).start()
+
+    def shutdown_solver(self):
+        """结束待命的求解进程 (它阻塞在任务队列上，不结束则解释器退出时会一直等待)"""
+        standby, self._standby = self._standby, None
+        if standby is not None and standby[0].is_alive():
+            standby[0].terminate()
+            standby[0].join()
+
+    def run_async_solver(self, mode, options=None, data=None, on_solution=None):
+        """
+        在子进程 (或求解服务) 中运行求解并显示进度弹窗，返回结果；中止时返回 None
+        :param on_solution: 流式模式 (ENUMERATE) 中每收到一个解时的回调
+        """
+        # 求解与弹窗相关模块在首次使用时才导入
+        import tkinter as tk
+        import tkinter.ttk as ttk
+        from worker import solver_worker
+
+        self.solver_failed = False
+        current_data = data if data is not None else [obj.to_dict() for obj in self.objects]
+        # 先做静态可行性检查，明显有错的盘面不启动求解
+        if not self.check_feasibility(current_data):
+            return None
+        options = dict(options or {})
+        job = channel = process = None
+        # 求解服务不支持流式回传，枚举始终使用本地进程
+        if SOLVER_SERVER_URL and on_solution is None:
+            from solve_server import RemoteJob
+            try:
+                job = RemoteJob.submit(SOLVER_SERVER_URL, mode, current_data, options)
+            except (OSError, ValueError) as e:
+                print(f"求解服务不可用，改用本地进程: {e}")
+        if job is None:
+            # 盘面与增量推理记录放入共享内存，队列只传头部；包围盒过大时退回直接传数据
+            channel = BoardChannel.create(current_data, options.get("prior"))
+            if channel is not None:
+                options.pop("prior", None)
+                payload = channel.header
+            else:
+                payload = current_data
+            standby, self._standby = self._standby, None
+            if standby is not None and standby[0].is_alive():
+                process, jobs, queue = standby
+                jobs.put((mode, payload, options))
+            else:
+                queue = multiprocessing.Queue()
+                process = multiprocessing.Process(target=solver_worker, args=(mode, payload, queue, options))
+                process.start()
+            # 为下一次求解准备新的待命进程
+            self.prewarm_solver()
+
+        streamed = 0
+
+        def poll():
+            """返回 (是否结束, 结果)"""
+            nonlocal streamed
+            if job is not None:
+                return job.poll()
+            # 先判断进程是否存活再取消息: 进程放入结果后退出时，结果一定已在队列中
+            alive = process.is_alive()
+            while True:
+                try:
+                    msg = queue.get_nowait()
+                except Empty:
+                    break
+                if isinstance(msg, tuple):  # 流式消息 (见 worker.solver_worker)
+                    kind, payload = msg
+                    if kind != "solution":
+                        return True, payload
+                    on_solution(payload)
+                    streamed += 1
+                    label.config(text=f"运行 {mode} 中...\n已找到 {streamed} 个")
+                    continue
+                return True, channel.read_result(msg) if channel is not None else msg
+            return not alive, None
         
-        root = tk.Tk()
-        root.withdraw()
+        root = get_tk_root()
         popup = tk.Toplevel(root)
         popup.title("计算中...")
         x = (root.winfo_screenwidth() // 2) - 150
@@ -89,18 +203,21 @@ class GridEditor:
         popup.grab_set()
         popup.resizable(False, False)
 
-        tk.Label(popup, text=f"运行 {mode} 中...\n(请稍候)", pady=20).pack()
+        label = tk.Label(popup, text=f"运行 {mode} 中...\n(请稍候)", pady=20)
+        label.pack()
         self.solver_result = None
         is_aborted = False
 
         def on_abort():
             nonlocal is_aborted
             is_aborted = True
-            if process.is_alive():
+            if job is not None:
+                job.cancel()
+            elif process.is_alive():
                 process.terminate()
                 process.join()
             popup.destroy()
-            root.destroy()
+            if channel is not None: channel.close()
             self.show_msg("已中止")
 
         ttk.Button(popup, text="中止", command=on_abort).pack(pady=5)
@@ -109,9 +226,10 @@ class GridEditor:
             try:
                 popup.update()
                 popup.update_idletasks()
-                if not process.is_alive() or not queue.empty():
-                    if not queue.empty(): self.solver_result = queue.get()
-                    if process.is_alive(): process.terminate()
+                finished, result = poll()
+                if finished:
+                    self.solver_result = result
+                    if process is not None and process.is_alive(): process.terminate()
                     break
                 time.sleep(0.05)
             except tk.TclError:
@@ -121,10 +239,82 @@ class GridEditor:
         if not is_aborted:
             try:
                 popup.destroy()
-                root.destroy()
+                root.update()
             except: pass
+            if channel is not None: channel.close()
+            if self.solver_result is None:
+                # 进程出错或异常退出 (详细信息已打印到控制台)
+                self.solver_failed = True
+                self.show_msg("求解出错，未得到结果")
         return self.solver_result
 
+    def check_feasibility(self, data=None):
+        """静态检查盘面，标出问题所在的格子；返回是否通过"""
+        if data is None:
+            data = [obj.to_dict() for obj in self.objects]
+        self.issues = check_board(data)
+        if self.issues:
+            for issue in self.issues:
+                print(f"盘面检查: {issue.message}")
+            more = f" (共 {len(self.issues)} 处)" if len(self.issues) > 1 else ""
+            self.show_msg(f"{self.issues[0].message}{more}")
+        return not self.issues
+
+    def request_hint(self, focus=None):
+        """请求一条单步提示，focus 为优先考虑的格子坐标"""
+        res = self.run_async_solver("HINT", {"focus": focus})
+        if res:
+            d = res[0]
+            actions.merge_solver_results(self, res[:1], SOLVER_MERGE_CONFLICT)
+            style = "连线" if d['data']['style'] == 'line' else "打叉"
+            self.show_msg(f"提示: ({d['x']}, {d['y']}) {d['data']['dir']} {style}")
+        elif res is not None: self.show_msg("没有可证明的新提示")
+
+    def easy_deductions(self):
+        """只用规则传播求出简单推论 (不调用 Z3，立即完成)"""
+        forced, issue = propagate([obj.to_dict() for obj in self.objects])
+        if issue is not None:
+            self.issues = [issue]
+            self.show_msg(issue.message)
+        elif forced:
+            stats = actions.merge_solver_results(self, forced_marks(forced), SOLVER_MERGE_CONFLICT)
+            self.show_msg("简单推理: " + self.merge_summary(stats))
+        else:
+            self.show_msg("没有新的简单推论")
+
+    def enumerate_solutions(self):
+        """枚举所有解 (流式接收，中止时保留已找到的解)，结果叠加显示供逐个查看"""
+        self.solutions, self.solution_idx = [], 0
+        options = {"limit": ENUMERATE_LIMIT, "time_limit": ENUMERATE_TIME_LIMIT}
+        stats = self.run_async_solver("ENUMERATE", options, on_solution=self.solutions.append)
+        n = len(self.solutions)
+        if stats is None:
+            if self.solver_failed:
+                self.show_msg(f"求解出错，保留已找到的 {n} 个解" if n else "求解出错，未得到结果")
+            elif not self.issues:
+                self.show_msg(f"已中止，保留已找到的 {n} 个解" if n else "已中止")
+        elif not n:
+            self.show_msg("无解")
+        else:
+            note = {"limit": f" (达到上限 {ENUMERATE_LIMIT})", "timeout": " (超时，可能不完整)"}.get(stats["status"], "")
+            self.show_msg(f"共 {n} 个解{note}，[ / ] 切换，Enter 应用")
+
+    def apply_solution(self):
+        """把当前查看的解合并到盘面"""
+        stats = actions.merge_solver_results(self, self.solutions[self.solution_idx], SOLVER_MERGE_CONFLICT)
+        self.solutions = []
+        self.show_msg(self.merge_summary(stats))
+
+    @staticmethod
+    def merge_summary(stats):
+        """合并求解结果后的提示文字"""
+        text = f"新增 {stats['added']} 处标记"
+        if stats['changed']:
+            text += f"，改写 {stats['changed']} 处"
+        if stats['conflicts'] > stats['changed']:
+            text += f"，{stats['conflicts'] - stats['changed']} 处与已有标记冲突 (已保留)"
+        return text
+
     # --- 主输入循环 (Event Dispatcher) ---
     def handle_input(self):
         mx, my = pygame.mouse.get_pos()
@@ -139,18 +329,101 @@ class GridEditor:
         for btn in self.buttons:
             btn.is_hovered = btn.rect.collidepoint((mx, my))
 
+        # 同一帧内的多个 MOUSEMOTION 只处理最后一个 (跳过的格子由插值补全)；
+        # 遇到其他事件前先处理挂起的移动，保证按下/松开前的笔画完整
+        pending_motion = None
         for event in pygame.event.get():
+            if event.type == pygame.MOUSEMOTION:
+                pending_motion = event
+                continue
+            if pending_motion is not None:
+                self.handle_motion(pending_motion, current_cls, is_simple_batch)
+                pending_motion = None
+
             if event.type == pygame.QUIT:
                 sys.exit()
 
             # 键盘: 快捷键与数值修改
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r: self.cam_x, self.cam_y = 50, 50
+                # F3: 性能叠加层；F4: 录制若干帧并导出 trace
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
+                if event.key == pygame.K_F4 and not self.profiler.recording:
+                    self.profiler.start_recording()
+                    self.show_msg(f"开始录制 {self.profiler.recording} 帧")
+                # F5: 只做静态检查，不求解
+                if event.key == pygame.K_F5 and self.check_feasibility():
+                    self.show_msg("静态检查未发现问题")
+                # Ctrl+Z 撤销，Ctrl+Y / Ctrl+Shift+Z 重做
+                if event.mod & pygame.KMOD_CTRL:
+                    if event.key == pygame.K_z and not event.mod & pygame.KMOD_SHIFT:
+                        self.show_msg("撤销" if self.history.undo(self) else "没有可撤销的操作")
+                    elif event.key in (pygame.K_y, pygame.K_z):
+                        self.show_msg("重做" if self.history.redo(self) else "没有可重做的操作")
+                    elif event.key in (pygame.K_c, pygame.K_x) and self.selection:
+                        self.clipboard = actions.copy_region(self, self.selection)
+                        if event.key == pygame.K_x:
+                            self.history.begin_group()
+                            actions.clear_region(self, self.selection)
+                            self.history.end_group()
+                        self.show_msg(f"已{'剪切' if event.key == pygame.K_x else '复制'} {len(self.clipboard)} 个物品")
+                    elif event.key == pygame.K_v and self.clipboard:
+                        cx, cy = self.screen_to_grid(mx, my)
+                        n = actions.paste_region(self, self.clipboard, cx, cy)
+                        self.show_msg(f"已粘贴 {n} 个物品")
+                    # Ctrl+S 保存画布目录 (只写修改过的块)，Ctrl+O 打开画布目录
+                    elif event.key == pygame.K_s:
+                        _, msg = save_canvas_dir(self.objects)
+                        self.show_msg(msg)
+                    elif event.key == pygame.K_o:
+                        ok, msg = open_canvas_dir(self.objects)
+                        if ok:
+                            # 撤销记录与推理缓存都属于旧盘面
+                            self.history.clear()
+                            self.deduct_record = None
+                            self.selection = None
+                        self.show_msg(msg)
+                    continue
+                # 选区操作: F 用当前物品填充，Delete 清除当前物品 (Shift+Delete 清除全部)，Esc 取消选区
+                if self.selection:
+                    if event.key == pygame.K_f:
+                        n = actions.fill_region(self, self.selection, current_cls)
+                        self.show_msg(f"填充 {n} 个{current_cls.name}")
+                        continue
+                    if event.key in (pygame.K_DELETE, pygame.K_BACKSPACE):
+                        target = None if event.mod & pygame.KMOD_SHIFT else current_cls
+                        n = actions.clear_region(self, self.selection, target)
+                        self.show_msg(f"清除 {n} 个物品")
+                        continue
+                    if event.key == pygame.K_ESCAPE:
+                        self.selection = None
+                        continue
+                # 查看枚举的解: [ / ] 切换，Enter 应用，Esc 关闭
+                if self.solutions:
+                    if event.key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+                        step = 1 if event.key == pygame.K_RIGHTBRACKET else -1
+                        self.solution_idx = (self.solution_idx + step) % len(self.solutions)
+                        self.show_msg(f"解 {self.solution_idx + 1} / {len(self.solutions)}")
+                        continue
+                    if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                        self.apply_solution()
+                        continue
+                    if event.key == pygame.K_ESCAPE:
+                        self.solutions = []
+                        continue
+                if event.key == pygame.K_ESCAPE and self.issues:
+                    self.issues = []
+                    continue
+                # H: 以光标所在格为中心请求提示
+                if event.key == pygame.K_h: self.request_hint(self.screen_to_grid(mx, my))
+                # E: 简单推理 (规则传播)
+                if event.key == pygame.K_e: self.easy_deductions()
                 # 键入数字
                 if event.unicode.isdigit():
                     candidates = [
-                        o for o in self.objects 
-                        if o.gx == hgx and o.gy == hgy and o.has_number and isinstance(o, current_cls)
+                        o for o in self.objects.at(hgx, hgy)
+                        if o.has_number and isinstance(o, current_cls)
                     ]
                     candidates.sort(key=lambda o: o.z_index, reverse=True)
                     if candidates:
@@ -165,16 +438,16 @@ class GridEditor:
                         if new_val >= limit:
                             new_val = digit
                         
-                        obj.data['num'] = new_val
+                        actions.set_object_data(self, obj, 'num', new_val)
                 # 键入空格，清空数字
                 if event.key == pygame.K_SPACE:
                     candidates = [
-                        o for o in self.objects 
-                        if o.gx == hgx and o.gy == hgy and o.has_number and isinstance(o, current_cls)
+                        o for o in self.objects.at(hgx, hgy)
+                        if o.has_number and isinstance(o, current_cls)
                     ]
                     candidates.sort(key=lambda o: o.z_index, reverse=True)
                     if candidates:
-                        candidates[0].data['num'] = 0
+                        actions.set_object_data(self, candidates[0], 'num', 0)
 
             # 鼠标按下
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -189,41 +462,51 @@ class GridEditor:
                             elif btn.data == "IMPORT": 
                                 new_objs, msg = load_map_from_json()
                                 if new_objs is not None: 
-                                    self.objects = new_objs
-                                    self.objects.sort(key=lambda o: o.z_index)
+                                    actions.replace_objects(self, new_objs)
+                                    # 导入的盘面不属于原画布目录，Ctrl+S 时重新选择保存位置
+                                    self.objects.unbind()
                                 self.show_msg(msg)
                             elif btn.data == "CLEAR": 
-                                self.objects = []
+                                actions.clear_objects(self)
                                 self.show_msg("已重置")
                             elif btn.data == "WIPE":
-                                self.objects = [obj for obj in self.objects if not isinstance(obj, Solve_mode)]
+                                actions.clear_objects(self, lambda obj: isinstance(obj, Solve_mode))
                                 self.show_msg("已清除标记")
                             elif btn.data == "SOLVE":
                                 res = self.run_async_solver("SOLVE")
                                 if res:
-                                    for d in res: self.objects.append(Solve_mode.from_dict(d))
-                                    self.objects.sort(key=lambda o: o.z_index)
-                                    self.show_msg(f"生成 {len(res)} 条线")
+                                    stats = actions.merge_solver_results(self, res, SOLVER_MERGE_CONFLICT)
+                                    self.show_msg(f"生成 {len(res)} 条线 " + self.merge_summary(stats))
                                 elif res is not None: self.show_msg("无解")
                             elif btn.data == "DEDUCT":
-                                res = self.run_async_solver("DEDUCT")
+                                board = copy.deepcopy([obj.to_dict() for obj in self.objects])
+                                res = self.run_async_solver("DEDUCT", {"prior": self.deduct_record}, board)
+                                if res is not None:
+                                    self.deduct_record = {"board": board, "facts": res}
                                 if res:
-                                    sigs = {(o.gx, o.gy, o.data['dir'], o.data['style']) for o in self.objects if o.name == "TrySolve"}
-                                    cnt = 0
-                                    for d in res:
-                                        sig = (d['x'], d['y'], d['data']['dir'], d['data']['style'])
-                                        if sig not in sigs:
-                                            actions.place_object(self, Solve_mode.from_dict(d))
-                                            cnt += 1
-                                    self.show_msg(f"新增 {cnt} 处标记")
+                                    stats = actions.merge_solver_results(self, res, SOLVER_MERGE_CONFLICT)
+                                    self.show_msg(self.merge_summary(stats))
                                 elif res is not None: self.show_msg("无新推论")
+                            elif btn.data == "HINT":
+                                self.request_hint()
+                            elif btn.data == "PROPAGATE":
+                                self.easy_deductions()
+                            elif btn.data == "ENUMERATE":
+                                self.enumerate_solutions()
                             else: 
                                 self.selected_item_idx = btn.data
                             clicked_ui = True
                             break
                     if clicked_ui: continue
 
-                    # 2. 处理网格操作
+                    # 2. Shift + 左键: 框选区域
+                    if pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                        self.select_anchor = self.screen_to_grid(*event.pos)
+                        self.selection = actions.normalize_rect(self.select_anchor, self.select_anchor)
+                        continue
+
+                    # 3. 处理网格操作 (整个拖拽笔画合并为一个撤销步骤)
+                    self.history.begin_group()
                     self.is_dragging_action = True
                     self.drag_start_pos = event.pos
                     self.drag_start_grid = (hgx, hgy) 
@@ -240,6 +523,7 @@ class GridEditor:
                     self.last_mouse_pos = event.pos
                 
                 elif event.button == 3: # 右键删除/反向操作
+                    self.history.begin_group()
                     if current_cls.is_continuous_tool:
                         self.is_dragging_action = True
                         self.last_drag_grid = (hgx, hgy)
@@ -253,39 +537,62 @@ class GridEditor:
 
             # 鼠标释放
             elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1 and self.select_anchor is not None:
+                    self.select_anchor = None
+                    continue
                 if event.button == 1 and self.is_dragging_action and not current_cls.is_continuous_tool and not is_simple_batch:
                     if not any(b.rect.collidepoint(event.pos) for b in self.buttons):
                         new_obj = current_cls(self.drag_start_grid[0], self.drag_start_grid[1])
                         new_obj.configure_on_creation(self.drag_start_pos, event.pos)
                         actions.place_object(self, new_obj)
 
+                self.history.end_group()
                 self.is_dragging_action = False
                 self.edge_op_mode = None
                 self.last_drag_grid = None
                 if event.button == 2: self.is_panning = False
 
-            # 鼠标移动
-            elif event.type == pygame.MOUSEMOTION:
-                if self.is_panning:
-                    self.cam_x += event.pos[0] - self.last_mouse_pos[0]
-                    self.cam_y += event.pos[1] - self.last_mouse_pos[1]
-                    self.last_mouse_pos = event.pos
+        if pending_motion is not None:
+            self.handle_motion(pending_motion, current_cls, is_simple_batch)
 
-                if self.is_dragging_action:
-                    if current_cls.is_continuous_tool:
-                        # 委托给 actions 模块处理
-                        actions.handle_continuous_tool(self, hgx, hgy, current_cls)
-                    elif is_simple_batch:
-                        if (hgx, hgy) != self.last_drag_grid:
-                            if pygame.mouse.get_pressed()[0]:
-                                actions.place_object(self, current_cls(hgx, hgy))
-                            elif pygame.mouse.get_pressed()[2]:
-                                actions.remove_object_at(self, hgx, hgy, current_cls.layer_id)
-                            self.last_drag_grid = (hgx, hgy)
+    def handle_motion(self, event, current_cls, is_simple_batch):
+        """处理 (合并后的) 鼠标移动: 平移视图或沿插值路径批量绘制"""
+        if self.is_panning:
+            self.cam_x += event.pos[0] - self.last_mouse_pos[0]
+            self.cam_y += event.pos[1] - self.last_mouse_pos[1]
+            self.last_mouse_pos = event.pos
+
+        if self.select_anchor is not None:
+            self.selection = actions.normalize_rect(self.select_anchor, self.screen_to_grid(*event.pos))
+            return
+        if not self.is_dragging_action:
+            return
+        hgx, hgy = self.screen_to_grid(event.pos[0], event.pos[1], current_cls.placement_type)
+        if current_cls.is_continuous_tool:
+            # 委托给 actions 模块处理
+            actions.handle_continuous_tool(self, hgx, hgy, current_cls)
+        elif is_simple_batch:
+            if (hgx, hgy) != self.last_drag_grid:
+                cells = actions.grid_line(self.last_drag_grid[0], self.last_drag_grid[1], hgx, hgy)[1:]
+                if pygame.mouse.get_pressed()[0]:
+                    actions.place_objects(self, [current_cls(x, y) for x, y in cells])
+                elif pygame.mouse.get_pressed()[2]:
+                    actions.remove_objects_at(self, cells, current_cls.layer_id)
+                self.last_drag_grid = (hgx, hgy)
 
     def run(self):
+        first_frame = True
         while True:
+            self.profiler.begin_frame()
             self.handle_input()
+            self.profiler.lap("input")
             # 委托给 renderer 模块绘制
             renderer.render_scene(self)
-            self.clock.tick(60)
\ No newline at end of file
+            if first_frame:
+                first_frame = False
+                self.prewarm_solver()
+            self.clock.tick(60)
+            self.profiler.lap("idle")
+            trace_path = self.profiler.end_frame()
+            if trace_path:
+                self.show_msg(f"trace 已保存: {trace_path}")
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+命令行枚举盘面的所有解
+每找到一个解就立即输出 (默认为字符画，--json 时每行一个 JSON 数组)，用于分析多解的坏题。
+
+用法:
+    python enumerate_solutions.py puzzle.json --limit 20 --time-limit 60
+"""
+import sys
+import json
+import argparse
+import contextlib
+
+# 连线方向集合 -> 字符 (N/S/W/E 为上/下/左/右)
+_GLYPHS = {
+    frozenset(): "·", frozenset("EW"): "─", frozenset("NS"): "│",
+    frozenset("SE"): "┌", frozenset("SW"): "┐", frozenset("NE"): "└", frozenset("NW"): "┘",
+    frozenset("E"): "╶", frozenset("W"): "╴", frozenset("N"): "╵", frozenset("S"): "╷",
+}
+
+
+def render_ascii(board, solution):
+    """把一个解画成字符网格: 地板格按连线方向取字符，端点等格内提示显示数字"""
+    # 与求解器一致，端点格即使没有地板也算作地板
+    floor = {(o['x'], o['y']) for o in board if o['type'] in ('FloorCell', 'EndPoint')}
+    labels = {(o['x'], o['y']): str(o['data'].get('num', '')) for o in board if o['type'] in ('EndPoint', 'YajilinArrow')}
+    dirs = {}
+    for d in solution:
+        x, y = d['x'], d['y']
+        if d['data']['dir'] == 'right':
+            dirs.setdefault((x, y), set()).add('E')
+            dirs.setdefault((x + 1, y), set()).add('W')
+        else:
+            dirs.setdefault((x, y), set()).add('S')
+            dirs.setdefault((x, y + 1), set()).add('N')
+    if not floor:
+        return ""
+    xs = [x for x, _ in floor]
+    ys = [y for _, y in floor]
+    lines = []
+    for y in range(min(ys), max(ys) + 1):
+        row = []
+        for x in range(min(xs), max(xs) + 1):
+            if (x, y) not in floor:
+                row.append(" ")
+            elif (x, y) in labels and labels[(x, y)]:
+                row.append(labels[(x, y)][-1])
+            else:
+                row.append(_GLYPHS.get(frozenset(dirs.get((x, y), ())), "┼"))
+        lines.append("".join(row))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="枚举盘面的所有解")
+    parser.add_argument("path", help="JSON 存档")
+    parser.add_argument("--limit", type=int, default=None, help="最多输出的解数")
+    parser.add_argument("--time-limit", type=float, default=None, help="总时限 (秒)")
+    parser.add_argument("--json", action="store_true", help="每行输出一个解的 Solve_mode 字典列表")
+    args = parser.parse_args(argv)
+
+    import solver
+    with open(args.path, "r", encoding='utf-8') as f:
+        board = json.load(f)
+
+    # 求解器的过程信息转到 stderr，stdout 只输出解
+    out = sys.stdout
+    gen = solver.iter_solutions(board, limit=args.limit, time_limit=args.time_limit)
+    count = 0
+    with contextlib.redirect_stdout(sys.stderr):
+        while True:
+            try:
+                solution = next(gen)
+            except StopIteration as stop:
+                status = stop.value
+                break
+            count += 1
+            if args.json:
+                print(json.dumps(solution, ensure_ascii=False), file=out, flush=True)
+            else:
+                print(f"# 解 {count}\n{render_ascii(board, solution)}\n", file=out, flush=True)
+
+    note = {"limit": "达到上限", "timeout": "超时，结果可能不完整"}.get(status, "已全部列出")
+    print(f"共 {count} 个解 ({note})", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
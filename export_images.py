@@ -0,0 +1,143 @@
+"""
+无界面批量导出盘面图片
+复用 MapObject.draw 的绘制代码 (SDL dummy 驱动，不打开窗口)，
+只按盘面包围盒创建离屏 Surface 绘制，再缩放到指定的格子尺寸保存为 PNG；
+可选先求解并把结果连线一并绘出。目录中的多个存档由进程池并行处理。
+
+用法:
+    python export_images.py puzzles/ --out images --cell-size 32 --solve
+"""
+import os
+import sys
+import glob
+import argparse
+import multiprocessing
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# 不让 SDL 接管 SIGTERM，否则进程池结束时无法终止工作进程
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import pygame
+
+from config import CELL_SIZE, BG_COLOR
+
+MARGIN = CELL_SIZE // 2  # 包围盒四周留白 (像素，按原始格子尺寸计)
+
+
+def _init_pygame():
+    """进程池初始化: 每个进程只初始化一次 pygame"""
+    pygame.display.init()
+    pygame.font.init()
+
+def board_bounds(objects):
+    """盘面包围盒 (格子坐标)；格点物品与向右/下的连线会占到右下相邻的格子"""
+    xs, ys = [], []
+    for obj in objects:
+        xs.append(obj.gx)
+        ys.append(obj.gy)
+        if obj.placement_type == 'vertex':
+            xs.append(obj.gx - 1)
+            ys.append(obj.gy - 1)
+        elif obj.placement_type == 'edge':
+            xs.append(obj.gx + (obj.data.get('dir') == 'right'))
+            ys.append(obj.gy + (obj.data.get('dir') == 'down'))
+    return min(xs), min(ys), max(xs), max(ys)
+
+def render_board(objects, cell_size=CELL_SIZE):
+    """
+    将物品列表绘制到一个只包含包围盒的离屏 Surface
+    绘制按原始 CELL_SIZE 进行 (与编辑器一致)，cell_size 不同时再整体平滑缩放
+    """
+    objects = sorted(objects, key=lambda o: o.z_index)
+    min_x, min_y, max_x, max_y = board_bounds(objects)
+    w = (max_x - min_x + 1) * CELL_SIZE + 2 * MARGIN
+    h = (max_y - min_y + 1) * CELL_SIZE + 2 * MARGIN
+    surf = pygame.Surface((w, h))
+    surf.fill(BG_COLOR)
+    cam_x, cam_y = MARGIN - min_x * CELL_SIZE, MARGIN - min_y * CELL_SIZE
+    for obj in objects:
+        obj.draw(surf, cam_x, cam_y)
+
+    if cell_size != CELL_SIZE:
+        scale = cell_size / CELL_SIZE
+        surf = pygame.transform.smoothscale(surf, (max(1, round(w * scale)), max(1, round(h * scale))))
+    return surf
+
+def export_file(path, out_dir, cell_size=CELL_SIZE, solve=False):
+    """导出单个存档，返回 (输入路径, 输出路径列表, 错误信息)"""
+    from io_handler import read_map
+    from map_objects import Solve_mode
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        objects = read_map(path)
+        if not objects:
+            return path, [], "空盘面"
+        outputs = []
+        out = os.path.join(out_dir, f"{name}.png")
+        pygame.image.save(render_board(objects, cell_size), out)
+        outputs.append(out)
+
+        if solve:
+            import solver
+            result = solver.solve([obj.to_dict() for obj in objects])
+            if not result:
+                return path, outputs, "无解"
+            # 求解结果替换盘面上已有的同位置标记
+            marks = {(d['x'], d['y'], d['data']['dir']) for d in result}
+            solved = [o for o in objects
+                      if not (isinstance(o, Solve_mode) and (o.gx, o.gy, o.data.get('dir')) in marks)]
+            solved += [Solve_mode.from_dict(d) for d in result]
+            out = os.path.join(out_dir, f"{name}_solved.png")
+            pygame.image.save(render_board(solved, cell_size), out)
+            outputs.append(out)
+        return path, outputs, None
+    except Exception as e:
+        return path, [], str(e)
+
+def _job(args):
+    return export_file(*args)
+
+def export_paths(paths, out_dir, cell_size=CELL_SIZE, solve=False, processes=None):
+    """用进程池导出多个存档，返回成功导出的图片数"""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(p, out_dir, cell_size, solve) for p in paths]
+    count = 0
+    pool = multiprocessing.Pool(processes, initializer=_init_pygame)
+    try:
+        for path, outputs, error in pool.imap_unordered(_job, jobs):
+            count += len(outputs)
+            for out in outputs:
+                print(f"{path} -> {out}")
+            if error:
+                print(f"{path}: {error}")
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面导出盘面图片")
+    parser.add_argument("inputs", nargs="+", help="JSON 存档或包含存档的目录")
+    parser.add_argument("--out", default="images")
+    parser.add_argument("--cell-size", type=int, default=CELL_SIZE, help="输出图片中每格的像素数")
+    parser.add_argument("--solve", action="store_true", help="额外导出带求解结果的图片")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    paths = []
+    for item in args.inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.json"))))
+        else:
+            paths.append(item)
+    n = export_paths(paths, args.out, args.cell_size, args.solve, args.processes)
+    print(f"共导出 {n} 张图片")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
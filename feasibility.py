@@ -0,0 +1,228 @@
+"""
+求解前的静态可行性检查
+只做图上的线性扫描 (BFS 连通性、度数上下界)，毫秒级完成；
+发现必然无解或题目本身有错的情况时给出具体位置，不必等 Z3 跑完才报告无解。
+规则与 solver._build_model 一致: 地板 = FloorCell + EndPoint 所在格，端点格恰有一条线，
+其余有线的格子恰有两条线，打叉的边不能有线。
+"""
+from collections import defaultdict, deque
+
+
+class Issue:
+    """一条诊断: kind 为问题类别，cells 为相关格子 (用于在编辑器中标出)"""
+    __slots__ = ("kind", "message", "cells")
+
+    def __init__(self, kind, message, cells):
+        self.kind = kind
+        self.message = message
+        self.cells = list(cells)
+
+    def __repr__(self):
+        return f"Issue({self.kind}: {self.message})"
+
+
+def _edge_cells(x, y, direction):
+    return ((x, y), (x + 1, y)) if direction == 'right' else ((x, y), (x, y + 1))
+
+
+class _Board:
+    """把盘面字典整理成检查用的集合"""
+    def __init__(self, problem_data):
+        self.floor = set()
+        self.endpoints = {}               # 格子 -> 编号
+        self.simpleloops = []
+        self.slitherlinks = []            # [(gx, gy, num)]
+        self.arrows = {}                  # 格子 -> data
+        self.lines = set()                # 标为连线的边 (格子a, 格子b)
+        self.crosses = set()              # 标为打叉的边
+        for obj in problem_data:
+            pos = (obj['x'], obj['y'])
+            t = obj['type']
+            d = obj.get('data', {})
+            if t == 'FloorCell':
+                self.floor.add(pos)
+            elif t == 'EndPoint':
+                self.floor.add(pos)
+                self.endpoints[pos] = d.get('num', 1)
+            elif t == 'Simpleloop':
+                self.simpleloops.append(pos)
+            elif t == 'Slitherlink':
+                self.slitherlinks.append((obj['x'], obj['y'], d.get('num', 0)))
+            elif t == 'YajilinArrow':
+                self.arrows[pos] = d
+            elif t == 'Solve_mode':
+                direction = d.get('dir', 'right')
+                if direction not in ('right', 'down'):
+                    continue
+                edge = _edge_cells(obj['x'], obj['y'], direction)
+                (self.lines if d.get('style', 'line') == 'line' else self.crosses).add(edge)
+
+    def open_edge(self, a, b):
+        """边 a-b 是否可能有线 (两端都是地板、都不是箭头格且未打叉)"""
+        edge = (a, b) if a <= b else (b, a)
+        return (a in self.floor and b in self.floor and a not in self.arrows and b not in self.arrows
+                and edge not in self.crosses)
+
+    def neighbors(self, cell):
+        x, y = cell
+        return ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+
+
+def check_board(problem_data):
+    """返回诊断列表；为空表示没有发现静态矛盾 (不代表一定有解)"""
+    if not problem_data:
+        return []
+    b = _Board(problem_data)
+    issues = []
+    issues += _check_lines(b)
+    issues += _check_degrees(b)
+    issues += _check_endpoints(b)
+    issues += _check_slitherlink(b)
+    issues += _check_yajilin(b)
+    return issues
+
+
+def _check_lines(b):
+    """已画的连线必须在地板上，且不能穿过箭头格"""
+    issues = []
+    for a, c in sorted(b.lines):
+        off = [cell for cell in (a, c) if cell not in b.floor]
+        if off:
+            issues.append(Issue("line_off_floor", f"连线 {a}-{c} 延伸到地板外的格子 {off[0]}", (a, c)))
+        elif a in b.arrows or c in b.arrows:
+            cell = a if a in b.arrows else c
+            issues.append(Issue("line_on_arrow", f"连线 {a}-{c} 经过 Yajilin 箭头格 {cell}", (a, c)))
+    return issues
+
+
+def _check_degrees(b):
+    """度数上下界: 端点恰一条线，经过的格子恰两条线"""
+    issues = []
+    line_degree = defaultdict(int)
+    for a, c in b.lines:
+        line_degree[a] += 1
+        line_degree[c] += 1
+    must_pass = set(b.simpleloops) | {cell for cell, n in line_degree.items() if n}
+
+    for cell in sorted(must_pass | set(b.endpoints)):
+        if cell not in b.floor:
+            if cell in b.simpleloops:
+                issues.append(Issue("loop_off_floor", f"Simpleloop {cell} 不在地板上", [cell]))
+            continue
+        is_end = cell in b.endpoints
+        need = 1 if is_end else 2
+        placed = line_degree.get(cell, 0)
+        available = sum(1 for n in b.neighbors(cell) if b.open_edge(cell, n))
+        if placed > need:
+            what = "端点" if is_end else "格子"
+            issues.append(Issue("degree", f"{what} {cell} 已有 {placed} 条连线，最多只能有 {need} 条", [cell]))
+        elif available < need:
+            if is_end:
+                msg = f"端点 {cell} 周围没有可连线的地板格"
+            else:
+                msg = f"格子 {cell} 必须有线经过，但只有 {available} 个方向可以连线"
+            issues.append(Issue("degree", msg, [cell]))
+    return issues
+
+
+def _components(b):
+    """按可连线的边划分地板连通块，返回 格子 -> 块编号"""
+    floor, arrows, crosses = b.floor, b.arrows, b.crosses
+    comp = {}
+    cid = 0
+    for start in floor:
+        if start in comp or start in arrows:
+            continue
+        cid += 1
+        comp[start] = cid
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            x, y = cell
+            # 与 open_edge 相同的判断，内联以减少大盘面上的函数调用
+            for n in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if n in comp or n not in floor or n in arrows:
+                    continue
+                if crosses and ((cell, n) if cell < n else (n, cell)) in crosses:
+                    continue
+                comp[n] = cid
+                queue.append(n)
+    return comp
+
+
+def _check_endpoints(b):
+    """Numberlink: 每个编号恰好两个端点，且两端位于同一连通块"""
+    issues = []
+    by_num = defaultdict(list)
+    for cell, num in b.endpoints.items():
+        by_num[num].append(cell)
+    comp = None
+    for num in sorted(by_num):
+        cells = sorted(by_num[num])
+        if len(cells) != 2:
+            issues.append(Issue("unpaired", f"编号 {num} 的端点有 {len(cells)} 个 (应为 2 个): {', '.join(map(str, cells))}", cells))
+            continue
+        if comp is None:
+            comp = _components(b)
+        if comp.get(cells[0]) != comp.get(cells[1]):
+            issues.append(Issue("disconnected", f"编号 {num} 的两个端点 {cells[0]}、{cells[1]} 不在同一块连通的地板上", cells))
+    return issues
+
+
+def _check_slitherlink(b):
+    """格点数字不能超过周围可连线的边数，也不能少于已画的连线数"""
+    issues = []
+    for gx, gy, num in b.slitherlinks:
+        tl, tr, bl, br = (gx - 1, gy - 1), (gx, gy - 1), (gx - 1, gy), (gx, gy)
+        edges = [(tl, tr), (tl, bl), (bl, br), (tr, br)]
+        available = sum(1 for a, c in edges if b.open_edge(a, c))
+        placed = sum(1 for e in edges if e in b.lines)
+        cells = (tl, tr, bl, br)
+        if num > available:
+            issues.append(Issue("slitherlink", f"格点 ({gx}, {gy}) 的数字 {num} 大于周围可连线的边数 {available}", cells))
+        elif num < placed:
+            issues.append(Issue("slitherlink", f"格点 ({gx}, {gy}) 的数字 {num} 小于已画的连线数 {placed}", cells))
+    return issues
+
+
+_ARROW_STEPS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+
+def _check_yajilin(b):
+    """箭头数字不能超过该方向上最多可涂黑的格数 (涂黑格不相邻，每段连续可涂格最多涂一半向上取整)"""
+    if not b.arrows:
+        return []
+    xs = [x for x, _ in b.floor]
+    ys = [y for _, y in b.floor]
+    if not xs:
+        return []
+    min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
+    # 有线经过的格子不能涂黑
+    unshadable = set(b.arrows) | set(b.simpleloops) | {cell for edge in b.lines for cell in edge}
+
+    issues = []
+    for (x, y), d in sorted(b.arrows.items()):
+        num = d.get('num')
+        if num is None:
+            continue
+        dx, dy = _ARROW_STEPS.get(d.get('dir', 'up'), (0, -1))
+        best = run = 0
+        cx, cy = x + dx, y + dy
+        while min_x <= cx <= max_x and min_y <= cy <= max_y:
+            if (cx, cy) in b.floor and (cx, cy) not in unshadable:
+                run += 1
+            else:
+                best += (run + 1) // 2
+                run = 0
+            cx, cy = cx + dx, cy + dy
+        best += (run + 1) // 2
+        if num > best:
+            issues.append(Issue("yajilin", f"箭头 ({x}, {y}) 的数字 {num} 超过该方向最多可涂黑的格数 {best}", [(x, y)]))
+    return issues
+
+
+def report(issues, limit=5):
+    """把诊断整理成多行文字 (超出 limit 条时省略)"""
+    lines = [issue.message for issue in issues[:limit]]
+    if len(issues) > limit:
+        lines.append(f"... 另有 {len(issues) - limit} 处问题")
+    return "\n".join(lines)
\ No newline at end of file
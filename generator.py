@@ -0,0 +1,213 @@
+"""
+题目生成器
+从随机的"填满式"连线解出发，逐条增删提示，
+在同一个增量 Z3 实例上检查唯一性，并通过进程池批量生成。
+
+用法:
+    python generator.py --kind numberlink --size 8 --count 20 --out generated
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import multiprocessing
+
+KINDS = ["numberlink", "slitherlink"]
+
+
+# --- 随机解 ---
+def random_hamiltonian_path(w, h, rng, moves=None):
+    """
+    以蛇形路径为起点，随机执行 backbite 变换，得到覆盖全部格子的随机路径
+    返回格子坐标列表 [(x, y), ...]
+    """
+    path = []
+    for y in range(h):
+        row = [(x, y) for x in range(w)]
+        path.extend(row if y % 2 == 0 else reversed(row))
+
+    if moves is None:
+        moves = min(2 * w * h, 4000)
+    for _ in range(moves):
+        if rng.random() < 0.5:
+            path.reverse()
+        # 以路径尾端为准，随机选择一个相邻格子，并反转其后的子路径
+        x, y = path[-1]
+        nx, ny = rng.choice(((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)))
+        if not (0 <= nx < w and 0 <= ny < h):
+            continue
+        idx = path.index((nx, ny))
+        if idx == len(path) - 2:
+            continue
+        path[idx + 1:] = reversed(path[idx + 1:])
+    return path
+
+def random_solution_paths(w, h, rng, min_len=3, max_len=None):
+    """将随机哈密顿路径切分成若干段，作为一组互不相交的连线解"""
+    if max_len is None:
+        max_len = max(min_len, (w + h) // 2)
+    full = random_hamiltonian_path(w, h, rng)
+    paths = []
+    i = 0
+    while i < len(full):
+        n = rng.randint(min_len, max_len)
+        if len(full) - (i + n) < min_len:
+            n = len(full) - i
+        paths.append(full[i:i + n])
+        i += n
+    return paths
+
+def path_edges(paths):
+    """将路径转换为 (x, y, dir) 边集合"""
+    edges = set()
+    for path in paths:
+        for (x1, y1), (x2, y2) in zip(path, path[1:]):
+            if y1 == y2:
+                edges.add((min(x1, x2), y1, 'right'))
+            else:
+                edges.add((x1, min(y1, y2), 'down'))
+    return edges
+
+def vertex_edges(vx, vy):
+    """格点 (vx, vy) 周围的四条边 (与 solver 中 Slitherlink 的定义一致)"""
+    return ((vx - 1, vy - 1, 'right'), (vx - 1, vy - 1, 'down'),
+            (vx - 1, vy, 'right'), (vx, vy - 1, 'down'))
+
+
+# --- 生成单题 ---
+def generate_puzzle(kind, w, h, seed, max_rounds=200):
+    """
+    生成一道唯一解的题目
+    返回 (盘面字典列表, 统计信息)；无法在 max_rounds 内收敛时盘面为 None
+    """
+    import solver
+    from z3 import Bool, Implies, Not, Or, PbEq, unsat
+
+    rng = random.Random(f"{kind}-{w}x{h}-{seed}")
+    paths = random_solution_paths(w, h, rng)
+    solution = path_edges(paths)
+
+    base = [{"type": "FloorCell", "x": x, "y": y, "data": {}} for y in range(h) for x in range(w)]
+    for num, path in enumerate(paths, 1):
+        for x, y in (path[0], path[-1]):
+            base.append({"type": "EndPoint", "x": x, "y": y, "data": {"num": num}})
+
+    # 1. 只建一次模型，之后所有唯一性检查都在这个实例上增量进行
+    ctx = solver._build_model(base)
+    s = ctx["sg"].solver
+    all_edges = [(x, y, d) for y in range(h) for x in range(w) for d in ('right', 'down')
+                 if (d == 'right' and x + 1 < w) or (d == 'down' and y + 1 < h)]
+    edge_vars = {e: solver._edge_expr(ctx, *e) for e in all_edges}
+
+    # "存在另一个解" = 至少有一条边与已知解不同；已知解恒满足，因此 unsat 即唯一
+    s.add(Or([Not(v) if e in solution else v for e, v in edge_vars.items()]))
+
+    # 2. 每条候选提示用一个开关变量守护，检查时以假设 (assumption) 形式打开
+    clues = {}
+    def clue_literal(key, constraint):
+        lit = Bool(f"clue_{len(clues)}")
+        s.add(Implies(lit, constraint))
+        clues[key] = lit
+        return key
+
+    active = []
+    if kind == "slitherlink":
+        for vy in range(1, h):
+            for vx in range(1, w):
+                terms = [(edge_vars[e], 1) for e in vertex_edges(vx, vy)]
+                cnt = sum(e in solution for e in vertex_edges(vx, vy))
+                active.append(clue_literal(("vertex", vx, vy, cnt), PbEq(terms, cnt)))
+
+    checks = 0
+    def is_unique():
+        nonlocal checks
+        checks += 1
+        return s.check(*[clues[k] for k in active]) == unsat
+
+    # 3. 加提示：从反例中挑一条与解不同的边，作为连线 (或叉) 提示
+    rounds = 0
+    while not is_unique():
+        rounds += 1
+        if rounds > max_rounds:
+            return None, {"checks": checks, "clues": len(active)}
+        model = s.model()
+        diff = [e for e, v in edge_vars.items()
+                if bool(model.eval(v, model_completion=True)) != (e in solution)]
+        missing = [e for e in diff if e in solution]
+        e = rng.choice(missing or diff)
+        style = 'line' if e in solution else 'cross'
+        key = ("edge",) + e + (style,)
+        if key not in clues:
+            clue_literal(key, edge_vars[e] if style == 'line' else Not(edge_vars[e]))
+        active.append(key)
+
+    # 4. 删提示：逐条尝试移除，仍唯一则保留移除
+    order = list(active)
+    rng.shuffle(order)
+    for key in order:
+        active.remove(key)
+        if not is_unique():
+            active.append(key)
+
+    board = list(base)
+    for key in active:
+        if key[0] == "vertex":
+            board.append({"type": "Slitherlink", "x": key[1], "y": key[2], "data": {"num": key[3]}})
+        else:
+            board.append({"type": "Solve_mode", "x": key[1], "y": key[2],
+                          "data": {"dir": key[3], "style": key[4]}})
+    return board, {"checks": checks, "clues": len(active)}
+
+def _job(args):
+    """进程池任务入口"""
+    kind, w, h, seed = args
+    t0 = time.perf_counter()
+    board, stats = generate_puzzle(kind, w, h, seed)
+    stats["seed"] = seed
+    stats["time"] = time.perf_counter() - t0
+    return board, stats
+
+
+# --- 批量生成 ---
+def generate_batch(kind, w, h, count, out_dir, seed=0, processes=None):
+    """
+    在进程池中生成 count 道题，接受的题目按存档格式写入 out_dir
+    返回统计信息 (含每分钟出题数)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(kind, w, h, seed + i) for i in range(count)]
+    accepted = 0
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        for board, stats in pool.imap_unordered(_job, jobs):
+            if board is None:
+                print(f"[seed {stats['seed']}] 放弃 ({stats['checks']} 次检查)")
+                continue
+            accepted += 1
+            p = os.path.join(out_dir, f"{kind}_{w}x{h}_{stats['seed']}.json")
+            with open(p, "w", encoding='utf-8') as f:
+                json.dump(board, f, indent=4)
+            print(f"[seed {stats['seed']}] {stats['clues']} 条提示, "
+                  f"{stats['checks']} 次检查, {stats['time']:.2f}s -> {p}")
+    elapsed = time.perf_counter() - t0
+    ppm = accepted / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"生成 {accepted}/{count} 道题，用时 {elapsed:.1f}s，{ppm:.1f} 题/分钟")
+    return {"accepted": accepted, "total": count, "elapsed": elapsed, "puzzles_per_minute": ppm}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="基于增量求解的批量出题")
+    parser.add_argument("--kind", choices=KINDS, default="numberlink")
+    parser.add_argument("--size", type=int, nargs=2, default=[8, 8], metavar=("W", "H"))
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--out", default="generated")
+    args = parser.parse_args(argv)
+    w, h = args.size
+    generate_batch(args.kind, w, h, args.count, args.out, args.seed, args.processes)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
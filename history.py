@@ -0,0 +1,124 @@
+# history.py
+"""
+撤销 / 重做
+不保存整个盘面的快照，只记录每次编辑的逆操作:
+    ("add", [物品...])        本次新增的物品 (撤销时删除)
+    ("remove", [物品...])     本次删除的物品 (撤销时放回)
+    ("data", 物品, 键, 旧值, 新值)   数字等属性修改
+物品以对象引用保存，不做深拷贝；一次拖拽笔画等可合并为一个撤销步骤。
+"""
+from collections import deque
+
+from config import HISTORY_MAX_ENTRIES, HISTORY_MAX_STEPS
+
+MISSING = object()  # 属性修改前不存在该键
+
+
+def _op_cost(op):
+    """估算一条记录占用的条目数 (按引用的物品个数计)"""
+    return len(op[1]) if op[0] in ("add", "remove") else 1
+
+
+class History:
+    def __init__(self, max_entries=HISTORY_MAX_ENTRIES, max_steps=HISTORY_MAX_STEPS):
+        self.max_entries = max_entries
+        self.max_steps = max_steps
+        self.undo_stack = deque()  # [(ops, cost)]
+        self.redo_stack = []
+        self.entries = 0           # 撤销栈当前占用的条目数
+        self._group = None         # 正在合并的步骤
+
+    # --- 记录 ---
+    def record(self, added=(), removed=()):
+        """记录一次增删 (removed 先于 added 发生)"""
+        ops = []
+        if removed:
+            ops.append(("remove", list(removed)))
+        if added:
+            ops.append(("add", list(added)))
+        self._push(ops)
+
+    def record_data(self, obj, key, old, new):
+        if old != new:
+            self._push([("data", obj, key, old, new)])
+
+    def begin_group(self):
+        """开始合并: 之后的记录在 end_group 前都属于同一步"""
+        self.end_group()
+        self._group = []
+
+    def end_group(self):
+        group, self._group = self._group, None
+        if group:
+            self._commit(group)
+
+    def _push(self, ops):
+        if not ops:
+            return
+        if self._group is not None:
+            self._group.extend(ops)
+        else:
+            self._commit(ops)
+
+    def _commit(self, ops):
+        cost = sum(_op_cost(op) for op in ops)
+        self.undo_stack.append((ops, cost))
+        self.entries += cost
+        self.redo_stack.clear()
+        # 超出预算时丢弃最早的步骤 (最新一步无论多大都保留)
+        while len(self.undo_stack) > 1 and (self.entries > self.max_entries or len(self.undo_stack) > self.max_steps):
+            _, old_cost = self.undo_stack.popleft()
+            self.entries -= old_cost
+
+    # --- 撤销 / 重做 ---
+    def undo(self, editor):
+        """撤销一步，返回是否成功"""
+        self.end_group()
+        if not self.undo_stack:
+            return False
+        ops, cost = self.undo_stack.pop()
+        self.entries -= cost
+        for op in reversed(ops):
+            _apply(editor, op, inverse=True)
+        self.redo_stack.append((ops, cost))
+        return True
+
+    def redo(self, editor):
+        """重做一步，返回是否成功"""
+        self.end_group()
+        if not self.redo_stack:
+            return False
+        ops, cost = self.redo_stack.pop()
+        for op in ops:
+            _apply(editor, op, inverse=False)
+        self.undo_stack.append((ops, cost))
+        self.entries += cost
+        return True
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.entries = 0
+        self._group = None
+
+
+def _apply(editor, op, inverse):
+    """执行一条记录 (inverse=True 时执行其逆操作)，不再产生新的记录"""
+    kind = op[0]
+    if kind == "data":
+        _, obj, key, old, new = op
+        value = old if inverse else new
+        # 所在块换出重读后盘面上是另一个对象，两者都要更新
+        live = editor.objects.resolve(obj)
+        for target in (obj,) if live is None or live is obj else (obj, live):
+            if value is MISSING:
+                target.data.pop(key, None)
+            else:
+                target.data[key] = value
+        editor.objects.mark_dirty(obj)
+        return
+    objs = op[1]
+    if (kind == "add") == inverse:
+        editor.objects.remove_many(objs)
+    else:
+        editor.objects.add_many(objs)
\ No newline at end of file
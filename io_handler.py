@@ -1,54 +1,99 @@
 # io_handler.py
 import json
-import tkinter as tk
-from tkinter import filedialog
 from map_objects import ITEM_REGISTRY
 
+def write_map(objects, file_path):
+    """将对象列表写入指定 JSON 文件 (不弹对话框)"""
+    data = [obj.to_dict() for obj in objects]
+    with open(file_path, "w", encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+
+def read_map(file_path):
+    """从指定 JSON 文件重建对象列表 (不弹对话框)"""
+    with open(file_path, "r", encoding='utf-8') as f:
+        data = json.load(f)
+
+    new_objects = []
+    name_map = {cls.__name__: cls for cls in ITEM_REGISTRY}
+
+    for item_data in data:
+        cls_name = item_data['type']
+        if cls_name in name_map:
+            new_objects.append(name_map[cls_name].from_dict(item_data))
+    return new_objects
+
 def save_map_to_json(objects):
     """保存当前对象列表为JSON"""
-    root = tk.Tk()
-    root.withdraw()
+    from tkinter import filedialog
+    from ui import get_tk_root
+    root = get_tk_root()
     file_path = filedialog.asksaveasfilename(
-        defaultextension=".json", filetypes=[("JSON", "*.json")], title="保存"
+        parent=root, defaultextension=".json", filetypes=[("JSON", "*.json")], title="保存"
     )
-    root.destroy()
+    root.update()
     
     if not file_path:
         return None, "取消保存"
 
     try:
-        data = [obj.to_dict() for obj in objects]
-        with open(file_path, "w", encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
+        write_map(objects, file_path)
         return file_path, f"保存成功: {file_path.split('/')[-1]}"
     except Exception as e:
         print(e)
         return None, "保存失败"
 
+def save_canvas_dir(board):
+    """保存分块画布 (ChunkedBoard)；尚未绑定目录时弹窗选择"""
+    directory = board.directory
+    if directory is None:
+        from tkinter import filedialog
+        from ui import get_tk_root
+        root = get_tk_root()
+        directory = filedialog.askdirectory(parent=root, title="保存画布目录")
+        root.update()
+        if not directory:
+            return None, "取消保存"
+
+    try:
+        n = board.save(directory)
+        return directory, f"保存成功: 写入 {n} 个块"
+    except Exception as e:
+        print(e)
+        return None, "保存失败"
+
+def open_canvas_dir(board):
+    """弹窗选择并打开分块画布目录 (只读入索引)"""
+    from tkinter import filedialog
+    from ui import get_tk_root
+    root = get_tk_root()
+    directory = filedialog.askdirectory(parent=root, title="打开画布目录")
+    root.update()
+
+    if not directory:
+        return False, "取消读取"
+
+    try:
+        board.open(directory)
+        return True, f"读取成功: {len(board)} 个物品"
+    except Exception as e:
+        print(e)
+        return False, "读取失败"
+
 def load_map_from_json():
     """从JSON文件读取并重建对象列表"""
-    root = tk.Tk()
-    root.withdraw()
+    from tkinter import filedialog
+    from ui import get_tk_root
+    root = get_tk_root()
     file_path = filedialog.askopenfilename(
-        filetypes=[("JSON", "*.json")], title="读取"
+        parent=root, filetypes=[("JSON", "*.json")], title="读取"
     )
-    root.destroy()
+    root.update()
     
     if not file_path:
         return None, "取消读取"
 
     try:
-        with open(file_path, "r", encoding='utf-8') as f:
-            data = json.load(f)
-        
-        new_objects = []
-        name_map = {cls.__name__: cls for cls in ITEM_REGISTRY}
-        
-        for item_data in data:
-            cls_name = item_data['type']
-            if cls_name in name_map:
-                new_objects.append(name_map[cls_name].from_dict(item_data))
-        
+        new_objects = read_map(file_path)
         return new_objects, f"读取成功: {file_path.split('/')[-1]}"
     except Exception as e:
         print(e)
@@ -0,0 +1,325 @@
+"""
+Numberlink 原生搜索引擎 (不依赖 Z3)
+边状态以两个整数位图 (line / cross) 打包存储，
+通过度数传播 + 路径端点追踪剪枝，再做回溯搜索。
+只处理仅含 FloorCell / EndPoint / Solve_mode 且数字成对的盘面，
+超过节点预算时返回 None，由调用方回退到 Z3 模型。
+"""
+from collections import defaultdict, deque
+
+SUPPORTED_TYPES = {"FloorCell", "EndPoint", "Solve_mode"}
+DEFAULT_NODE_BUDGET = 300
+
+
+class _Unsat(Exception):
+    """当前分支矛盾"""
+
+
+class _Board:
+    """盘面的静态结构: 格子/边编号及邻接位图"""
+    def __init__(self, floor_cells, endpoints):
+        self.cells = sorted(floor_cells)
+        self.index = {pos: i for i, pos in enumerate(self.cells)}
+        self.edges = []          # [(key, a, b)]
+        self.edge_index = {}
+        self.cell_mask = [0] * len(self.cells)
+        for (x, y) in self.cells:
+            for d, other in (('right', (x + 1, y)), ('down', (x, y + 1))):
+                if other in self.index:
+                    e = len(self.edges)
+                    a, b = self.index[(x, y)], self.index[other]
+                    self.edges.append(((x, y, d), a, b))
+                    self.edge_index[(x, y, d)] = e
+                    self.cell_mask[a] |= 1 << e
+                    self.cell_mask[b] |= 1 << e
+
+        self.num = [None] * len(self.cells)   # 端点编号，非端点为 None
+        self.mate = [None] * len(self.cells)  # 同号的另一个端点
+        by_num = defaultdict(list)
+        for pos, n in endpoints.items():
+            i = self.index[pos]
+            self.num[i] = n
+            by_num[n].append(i)
+        for a, b in by_num.values():
+            self.mate[a], self.mate[b] = b, a
+
+    def other(self, e, c):
+        _, a, b = self.edges[e]
+        return b if a == c else a
+
+
+class _State:
+    """可复制的搜索状态"""
+    __slots__ = ("line", "cross", "partner")
+
+    def __init__(self, line, cross, partner):
+        self.line = line
+        self.cross = cross
+        self.partner = partner
+
+    def copy(self):
+        return _State(self.line, self.cross, list(self.partner))
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _set_line(board, st, e, queue):
+    bit = 1 << e
+    if st.line & bit:
+        return
+    if st.cross & bit:
+        raise _Unsat
+    _, a, b = board.edges[e]
+    pa, pb = st.partner[a], st.partner[b]
+    if pa == b:
+        raise _Unsat  # 成环
+    na, nb = board.num[pa], board.num[pb]
+    if na is not None and nb is not None and board.mate[pa] != pb:
+        raise _Unsat  # 连接了不同编号的端点
+    st.partner[pa], st.partner[pb] = pb, pa
+    st.line |= bit
+    queue.append(a)
+    queue.append(b)
+    # 链端变化后，新链两端的格子需要重新检查
+    queue.append(pa)
+    queue.append(pb)
+
+
+def _set_cross(board, st, e, queue):
+    bit = 1 << e
+    if st.cross & bit:
+        return
+    if st.line & bit:
+        raise _Unsat
+    st.cross |= bit
+    _, a, b = board.edges[e]
+    queue.append(a)
+    queue.append(b)
+
+
+def _link_is_bad(board, st, e):
+    """该边画线后是否必然矛盾 (成环或连错端点)"""
+    _, a, b = board.edges[e]
+    pa, pb = st.partner[a], st.partner[b]
+    if pa == b:
+        return True
+    return board.num[pa] is not None and board.num[pb] is not None and board.mate[pa] != pb
+
+
+def _propagate(board, st, queue):
+    while queue:
+        c = queue.popleft()
+        mask = board.cell_mask[c]
+        lines = st.line & mask
+        unknown = mask & ~st.line & ~st.cross
+        L = bin(lines).count("1")
+        target = 1 if board.num[c] is not None else None
+        if L > 2 or (target == 1 and L > 1):
+            raise _Unsat
+        if L == 2 or (target == 1 and L == 1):
+            for e in _bits(unknown):
+                _set_cross(board, st, e, queue)
+            continue
+        # 链端 (端点或度数为 1 的格子): 排除必然矛盾的边
+        if L == 1 or target == 1:
+            for e in _bits(unknown):
+                if _link_is_bad(board, st, e):
+                    _set_cross(board, st, e, queue)
+            unknown = mask & ~st.line & ~st.cross
+            U = bin(unknown).count("1")
+            if U == 0:
+                raise _Unsat
+            if U == 1:
+                _set_line(board, st, unknown.bit_length() - 1, queue)
+        elif unknown and unknown & (unknown - 1) == 0:
+            # 普通空格只剩一条可用边: 度数不可能为 2
+            _set_cross(board, st, unknown.bit_length() - 1, queue)
+
+
+def _open_ends(board, st):
+    """尚未完成的链端: 度数为 0 的端点或度数为 1 的普通格子"""
+    ends = []
+    for c, mask in enumerate(board.cell_mask):
+        L = bin(st.line & mask).count("1")
+        if (board.num[c] is not None and L == 0) or (board.num[c] is None and L == 1):
+            ends.append(c)
+    return ends
+
+
+def _reachable(board, st, ends):
+    """
+    每条未完成的链都必须还能通过空闲格子连到对应的另一端
+    先对空闲格子做一次连通分量标记，再逐对检查两个链端是否接触同一分量
+    两端都不是端点的浮动线段可以被路径从一端穿到另一端，其两端视为空闲格子并归入同一分量
+    """
+    usable = ~st.cross & ~st.line
+    free = []
+    for c, mask in enumerate(board.cell_mask):
+        lines = st.line & mask
+        if board.num[c] is not None:
+            free.append(False)
+        elif not lines:
+            free.append(True)
+        else:
+            # 浮动线段的链端: 度数为 1，且另一端也不是端点
+            free.append(not lines & (lines - 1) and board.num[st.partner[c]] is None)
+    label = [-1] * len(board.cells)
+    n_labels = 0
+    for start, is_free in enumerate(free):
+        if not is_free or label[start] >= 0:
+            continue
+        label[start] = n_labels
+        stack = [start]
+        while stack:
+            cur = stack.pop()
+            neighbors = [board.other(e, cur) for e in _bits(board.cell_mask[cur] & usable)]
+            if st.partner[cur] != cur:
+                neighbors.append(st.partner[cur])  # 沿浮动线段到达另一端
+            for n in neighbors:
+                if free[n] and label[n] < 0:
+                    label[n] = n_labels
+                    stack.append(n)
+        n_labels += 1
+
+    def touching(c):
+        cells, labels = set(), set()
+        for e in _bits(board.cell_mask[c] & usable):
+            n = board.other(e, c)
+            cells.add(n)
+            if free[n]:
+                labels.add(label[n])
+        return cells, labels
+
+    open_set = set(ends)
+    checked = set()
+    for c in ends:
+        root = st.partner[c]
+        if board.num[root] is None or board.num[root] in checked:
+            continue
+        checked.add(board.num[root])
+        goal = st.partner[board.mate[root]]
+        if goal not in open_set:
+            return False
+        cells, labels = touching(c)
+        if goal in cells:
+            continue
+        if not labels & touching(goal)[1]:
+            return False
+    return True
+
+
+def _search(board, st, budget):
+    """迭代式深度优先搜索，返回解的状态；无解返回 False；超出预算返回 None"""
+    stack = [st]
+    nodes = 0
+    while stack:
+        st = stack.pop()
+        nodes += 1
+        if nodes > budget:
+            return None
+        ends = _open_ends(board, st)
+        if not ends:
+            return st
+        if not _reachable(board, st, ends):
+            continue
+
+        # 选择分支链端 (其恰好还需要一条线): 优先只剩一种选择的，其次离目标最近的
+        def goal_of(c):
+            root = st.partner[c]
+            return st.partner[board.mate[root]] if board.num[root] is not None else None
+
+        def priority(c):
+            n_options = bin(board.cell_mask[c] & ~st.line & ~st.cross).count("1")
+            goal = goal_of(c)
+            if goal is None:
+                return (n_options > 1, 0)
+            (x1, y1), (x2, y2) = board.cells[c], board.cells[goal]
+            return (n_options > 1, abs(x1 - x2) + abs(y1 - y2))
+        c = min(ends, key=priority)
+        options = list(_bits(board.cell_mask[c] & ~st.line & ~st.cross))
+
+        # 朝目标方向的边优先尝试 (后入栈先出)
+        goal = goal_of(c)
+        if goal is not None:
+            gx, gy = board.cells[goal]
+            def dist(e):
+                nx, ny = board.cells[board.other(e, c)]
+                return abs(nx - gx) + abs(ny - gy)
+            options.sort(key=dist, reverse=True)
+
+        for e in options:
+            child = st.copy()
+            try:
+                queue = deque()
+                _set_line(board, child, e, queue)
+                _propagate(board, child, queue)
+            except _Unsat:
+                continue
+            stack.append(child)
+    return False
+
+
+def try_solve(problem_data, node_budget=DEFAULT_NODE_BUDGET):
+    """
+    尝试用原生搜索求解
+    返回 Solve_mode 连线字典列表；无解返回 []；盘面不适用或超出预算返回 None
+    """
+    if not problem_data:
+        return None
+    if any(obj['type'] not in SUPPORTED_TYPES for obj in problem_data):
+        return None
+
+    floor_cells = set()
+    endpoints = {}
+    marks = []
+    for obj in problem_data:
+        pos = (obj['x'], obj['y'])
+        if obj['type'] == 'FloorCell':
+            floor_cells.add(pos)
+        elif obj['type'] == 'EndPoint':
+            floor_cells.add(pos)
+            endpoints[pos] = obj.get('data', {}).get('num', 1)
+        else:
+            marks.append(obj)
+
+    # 只处理每个数字恰好出现两次的盘面
+    counts = defaultdict(int)
+    for n in endpoints.values():
+        counts[n] += 1
+    if any(v != 2 for v in counts.values()):
+        return None
+
+    board = _Board(floor_cells, endpoints)
+    st = _State(0, 0, list(range(len(board.cells))))
+    queue = deque(range(len(board.cells)))
+    try:
+        for obj in marks:
+            d = obj.get('data', {})
+            direction = d.get('dir', 'right')
+            if direction not in ('right', 'down'):
+                continue
+            e = board.edge_index.get((obj['x'], obj['y'], direction))
+            if d.get('style', 'line') == 'line':
+                if e is None:
+                    return []  # 连线通向非地板格
+                _set_line(board, st, e, queue)
+            elif e is not None:
+                _set_cross(board, st, e, queue)
+        _propagate(board, st, queue)
+    except _Unsat:
+        return []
+
+    result = _search(board, st, node_budget)
+    if result is None:
+        return None
+    if result is False:
+        return []
+    return [
+        {"type": "Solve_mode", "x": key[0], "y": key[1], "data": {"dir": key[2], "style": "line"}}
+        for e, (key, _, _) in enumerate(board.edges) if result.line >> e & 1
+    ]
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+求解组合 (Portfolio)
+同一盘面在多个进程中以不同编码/配置并行求解，取最先得出的确定结果，
+其余进程立即终止；每次的胜出配置追加记录到日志，供后续调参。
+"""
+import json
+import time
+import multiprocessing
+import queue as queue_mod
+
+from config import PORTFOLIO_LOG
+from canonical import canonical_hash
+
+# 参赛配置: encoding 为 'grilops' (整数符号编码) 或 'edge' (纯布尔边编码)
+PORTFOLIO_CONFIGS = [
+    {"name": "grilops", "encoding": "grilops"},
+    {"name": "grilops-seed7", "encoding": "grilops", "seed": 7},
+    {"name": "grilops-qflia", "encoding": "grilops", "tactic": "qflia"},
+    {"name": "edge", "encoding": "edge"},
+    {"name": "edge-qffd", "encoding": "edge", "logic": "QF_FD", "seed": 3},
+]
+
+# 没有配置得出结果时的返回值，与单一求解器无解时一致
+_NO_RESULT = {"solve": [], "unique": None}
+
+def puzzle_hash(problem_data):
+    """盘面的规范哈希 (与对象顺序、平移、旋转镜像及端点编号无关)，用作日志中的题目标识"""
+    return canonical_hash(problem_data)[:16]
+
+def _run_config(task, config, problem_data, queue):
+    """
+    运行在独立进程中的单个配置
+    :param task: 'solve' 或 'unique'
+    """
+    t0 = time.perf_counter()
+    try:
+        if config["encoding"] == "edge":
+            import edge_solver
+            fn = edge_solver.solve if task == "solve" else edge_solver.check_unique
+            result = fn(problem_data, seed=config.get("seed"), logic=config.get("logic"))
+        else:
+            import solver
+            fn = solver.solve if task == "solve" else solver.check_unique
+            result = fn(problem_data, config=config)
+        queue.put((config["name"], True, result, time.perf_counter() - t0))
+    except Exception as e:
+        print(f"Portfolio [{config['name']}] Error: {e}")
+        queue.put((config["name"], False, None, time.perf_counter() - t0))
+
+def _log_result(log_path, record):
+    if not log_path:
+        return
+    try:
+        with open(log_path, "a", encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"Portfolio: 写日志失败 {e}")
+
+def run_portfolio(task, problem_data, configs=None, timeout=None, log_path=PORTFOLIO_LOG):
+    """
+    并行运行所有配置，返回第一个确定结果 (与 solver.solve / check_unique 返回值一致)
+    所有配置都失败或超时时返回与单一求解器无解时相同的值 (solve 为 []，unique 为 None)
+    """
+    configs = configs or PORTFOLIO_CONFIGS
+    queue = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_run_config, args=(task, cfg, problem_data, queue), daemon=True)
+        for cfg in configs
+    ]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+
+    winner, result, elapsed = None, _NO_RESULT.get(task), None
+    failed = 0
+    try:
+        while failed < len(procs):
+            remaining = None if timeout is None else timeout - (time.perf_counter() - t0)
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                name, ok, res, t = queue.get(timeout=remaining)
+            except queue_mod.Empty:
+                break
+            if ok:
+                winner, result, elapsed = name, res, t
+                break
+            failed += 1
+    finally:
+        # 取消其余进程
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
+
+    if winner:
+        print(f"Portfolio: {task} 胜出配置 {winner} ({elapsed:.2f}s)")
+    else:
+        print(f"Portfolio: {task} 所有配置都失败或超时")
+    _log_result(log_path, {
+        "puzzle": puzzle_hash(problem_data),
+        "task": task,
+        "winner": winner,
+        "time": elapsed,
+        "wall": time.perf_counter() - t0,
+        "configs": [cfg["name"] for cfg in configs],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    return result
\ No newline at end of file
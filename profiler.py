@@ -0,0 +1,117 @@
+# profiler.py
+"""
+帧耗时分析
+每帧按顺序打点 (lap)，统计输入处理、各渲染步骤、display.flip 等阶段的耗时，
+以及每种 MapObject 的绘制耗时；可叠加显示在画面上 (F3)，
+也可录制若干帧导出为 Chrome trace JSON (F4)，用 chrome://tracing 或 Perfetto 打开。
+未开启时各打点函数立即返回，几乎没有额外开销。
+"""
+import os
+import json
+import time
+from collections import defaultdict, deque
+
+from config import PROFILER_TRACE_FRAMES, PROFILER_TRACE_DIR
+
+
+class FrameProfiler:
+    def __init__(self, window=60):
+        self.overlay = False      # 是否显示叠加层
+        self.recording = 0        # 剩余待录制的帧数
+        self.timing = False       # 本帧是否计时 (帧开始时确定)
+        self.frame_times = deque(maxlen=window)
+        self.phase_times = defaultdict(lambda: deque(maxlen=window))
+        self.type_times = defaultdict(lambda: deque(maxlen=window))
+        self.type_counts = {}
+        self.trace_events = []
+        self._frame_start = None
+        self._last = 0.0
+        self._phases = {}
+        self._types = {}
+
+    # --- 控制 ---
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        return self.overlay
+
+    def start_recording(self, frames=PROFILER_TRACE_FRAMES):
+        self.recording = frames
+        self.trace_events = []
+
+    # --- 打点 ---
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.frame_times.append(now - self._frame_start)
+        self._frame_start = self._last = now
+        self.timing = self.overlay or self.recording > 0
+        self._phases = {}
+        self._types = {}
+
+    def lap(self, name):
+        """结束一个阶段: 自上一次打点以来的耗时计入 name"""
+        if not self.timing:
+            return
+        now = time.perf_counter()
+        dt = now - self._last
+        self._phases[name] = self._phases.get(name, 0.0) + dt
+        if self.recording:
+            self.trace_events.append({
+                "name": name, "cat": "frame", "ph": "X", "pid": 1, "tid": 1,
+                "ts": self._last * 1e6, "dur": dt * 1e6,
+            })
+        self._last = now
+
+    def add_draw(self, type_name, dt):
+        """累计某种物品的绘制耗时 (由 renderer 在计时帧中逐个调用)"""
+        entry = self._types.get(type_name)
+        if entry is None:
+            self._types[type_name] = [dt, 1]
+        else:
+            entry[0] += dt
+            entry[1] += 1
+
+    def end_frame(self):
+        """结束一帧；录制完成时写出 trace 文件并返回其路径"""
+        if not self.timing:
+            return None
+        for name, dt in self._phases.items():
+            self.phase_times[name].append(dt)
+        for name, (dt, count) in self._types.items():
+            self.type_times[name].append(dt)
+            self.type_counts[name] = count
+        if not self.recording:
+            return None
+        self.trace_events.append({
+            "name": "draw_by_type_ms", "ph": "C", "pid": 1, "tid": 1, "ts": self._last * 1e6,
+            "args": {name: dt * 1000 for name, (dt, _) in self._types.items()},
+        })
+        self.recording -= 1
+        if self.recording == 0:
+            return self.write_trace()
+        return None
+
+    # --- 输出 ---
+    def write_trace(self, path=None):
+        if path is None:
+            os.makedirs(PROFILER_TRACE_DIR, exist_ok=True)
+            path = os.path.join(PROFILER_TRACE_DIR, time.strftime("frames_%Y%m%d_%H%M%S.json"))
+        with open(path, "w", encoding='utf-8') as f:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f)
+        self.trace_events = []
+        return path
+
+    def overlay_lines(self):
+        """叠加层文字: FPS、各阶段平均耗时 (ms)、各类物品的绘制耗时"""
+        def avg(values):
+            return sum(values) / len(values) * 1000 if values else 0.0
+
+        frame_ms = avg(self.frame_times)
+        lines = [f"FPS {1000 / frame_ms:5.1f}  帧 {frame_ms:6.2f} ms" if frame_ms else "FPS --"]
+        for name, values in self.phase_times.items():
+            lines.append(f"{name:<10s} {avg(values):6.2f} ms")
+        for name, values in sorted(self.type_times.items(), key=lambda kv: -avg(kv[1])):
+            lines.append(f"  {name:<12s} {avg(values):6.2f} ms x{self.type_counts.get(name, 0)}")
+        if self.recording:
+            lines.append(f"录制中，剩余 {self.recording} 帧")
+        return lines
\ No newline at end of file
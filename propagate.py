@@ -0,0 +1,199 @@
+"""
+纯规则的约束传播 (不依赖 Z3)
+把盘面整理成格子 / 边的整数数组，每条规则都是"若干条边中有线的数量属于某个集合":
+    端点格        恰 1 条
+    Simpleloop    恰 2 条
+    其余地板格    0 或 2 条
+    非地板 / 箭头 0 条
+    Slitherlink   格点四周恰 num 条
+反复应用 "剩余可能的数量都等于已有线数 -> 其余边打叉 / 都等于线数加未定数 -> 其余边连线"，
+直到不再变化。得到的确定边在 solver._build_model 中作为固定值加入模型，
+也可以在编辑器中单独运行，作为即时的"简单推理"。
+"""
+from collections import deque
+
+from feasibility import Issue
+
+UNKNOWN, LINE, CROSS = 0, 1, 2
+
+
+class _Grid:
+    """盘面的数组表示: 格子编号 i = 行 * 宽 + 列，边编号 2i (右边) / 2i + 1 (下边)"""
+    def __init__(self, problem_data):
+        xs = [obj['x'] for obj in problem_data]
+        ys = [obj['y'] for obj in problem_data]
+        self.min_x, self.min_y = min(xs), min(ys)
+        self.w = max(xs) - self.min_x + 1
+        self.h = max(ys) - self.min_y + 1
+        n = self.w * self.h
+
+        floor = bytearray(n)
+        blocked = bytearray(n)     # 箭头格: 是地板但不能有线
+        self.allowed = [None] * n  # 每格允许的连线数，None 表示 {0, 2}
+        self.marks = []            # 已画的 (边编号, 状态)
+        self.vertices = []         # [(格点坐标, 边编号列表, 数字)]
+        loops = []
+        for obj in problem_data:
+            t = obj['type']
+            d = obj.get('data', {})
+            i = self.index(obj['x'], obj['y'])
+            if t == 'FloorCell':
+                floor[i] = 1
+            elif t == 'EndPoint':
+                floor[i] = 1
+                self.allowed[i] = {1}
+            elif t == 'YajilinArrow':
+                blocked[i] = 1
+            elif t == 'Simpleloop':
+                loops.append(i)
+            elif t == 'Solve_mode':
+                e = self.edge(obj['x'], obj['y'], d.get('dir', 'right'))
+                if e is not None:
+                    self.marks.append((e, LINE if d.get('style', 'line') == 'line' else CROSS))
+            elif t == 'Slitherlink':
+                self.vertices.append(((obj['x'], obj['y']), self.vertex_edges(obj['x'], obj['y']), d.get('num', 0)))
+        for i in loops:
+            if self.allowed[i] is None:
+                self.allowed[i] = {2}
+        for i in range(n):
+            if not floor[i] or blocked[i]:
+                self.allowed[i] = {0}
+        self.open = [floor[i] and not blocked[i] for i in range(n)]
+
+    def index(self, x, y):
+        return (y - self.min_y) * self.w + (x - self.min_x)
+
+    def edge(self, x, y, direction):
+        """边 (x, y, direction) 的编号；另一端超出盘面时返回 None"""
+        cx, cy = x - self.min_x, y - self.min_y
+        if not (0 <= cx < self.w and 0 <= cy < self.h):
+            return None
+        if direction == 'right':
+            return 2 * self.index(x, y) if cx + 1 < self.w else None
+        if direction == 'down':
+            return 2 * self.index(x, y) + 1 if cy + 1 < self.h else None
+        return None
+
+    def cell_edges(self, i):
+        cy, cx = divmod(i, self.w)
+        edges = []
+        if cx + 1 < self.w: edges.append(2 * i)
+        if cy + 1 < self.h: edges.append(2 * i + 1)
+        if cx > 0: edges.append(2 * (i - 1))
+        if cy > 0: edges.append(2 * (i - self.w) + 1)
+        return edges
+
+    def vertex_edges(self, gx, gy):
+        """格点 (gx, gy) 四周的边 (与 solver 中 Slitherlink 约束的四条边相同)"""
+        candidates = (self.edge(gx - 1, gy - 1, 'right'), self.edge(gx - 1, gy - 1, 'down'),
+                      self.edge(gx - 1, gy, 'right'), self.edge(gx, gy - 1, 'down'))
+        return [e for e in candidates if e is not None]
+
+    def cell(self, i):
+        cy, cx = divmod(i, self.w)
+        return cx + self.min_x, cy + self.min_y
+
+    def edge_key(self, e):
+        return (*self.cell(e // 2), 'down' if e % 2 else 'right')
+
+
+def propagate(problem_data):
+    """
+    传播盘面上由局部规则即可确定的边
+    返回 (forced, issue): forced 为新确定的边 {(x, y, dir): 是否有线}，不含盘面上已画的标记，
+    只包含两侧都可以连线的边；发现矛盾时 forced 为 None，issue 给出矛盾的位置
+    """
+    if not problem_data:
+        return {}, None
+    g = _Grid(problem_data)
+    n_edges = 2 * g.w * g.h
+    state = bytearray(n_edges)
+
+    # 规则表: cons_edges[k] 中有线的数量必须属于 cons_allowed[k] (前 w * h 条为格子，其后为格点)
+    cons_edges, cons_allowed = [], []
+    for i, allowed in enumerate(g.allowed):
+        cons_edges.append(g.cell_edges(i))
+        cons_allowed.append(allowed or {0, 2})
+    for _, edges, num in g.vertices:
+        cons_edges.append(edges)
+        cons_allowed.append({num})
+    edge_cons = [[] for _ in range(n_edges)]
+    for k, edges in enumerate(cons_edges):
+        for e in edges:
+            edge_cons[e].append(k)
+
+    queued = bytearray(len(cons_edges))
+    queue = deque()
+
+    def assign(e, value):
+        """设定边的状态，返回是否与已有状态一致"""
+        if state[e] == value:
+            return True
+        if state[e] != UNKNOWN:
+            return False
+        state[e] = value
+        for k in edge_cons[e]:
+            if not queued[k]:
+                queued[k] = 1
+                queue.append(k)
+        return True
+
+    for e, value in g.marks:
+        if not assign(e, value):
+            x, y, d = g.edge_key(e)
+            return None, Issue("propagate", f"边 ({x}, {y}) {d} 同时标为连线与打叉", [(x, y)])
+    for k in range(len(cons_edges)):
+        if not queued[k]:
+            queued[k] = 1
+            queue.append(k)
+
+    while queue:
+        k = queue.popleft()
+        queued[k] = 0
+        edges = cons_edges[k]
+        lines = unknown = 0
+        for e in edges:
+            s = state[e]
+            if s == LINE: lines += 1
+            elif s == UNKNOWN: unknown += 1
+        # 在已有线数与 线数 + 未定数 之间仍可能的取值
+        possible = [t for t in cons_allowed[k] if lines <= t <= lines + unknown]
+        if not possible:
+            if k < len(g.allowed):
+                cells = [g.cell(k)]
+            elif edges:
+                cells = sorted({g.cell(e // 2) for e in edges})
+            else:
+                # 格点在盘面左上角外侧，四周没有边
+                cells = [g.vertices[k - len(g.allowed)][0]]
+            return None, Issue("propagate", f"{cells[0]} 附近的连线数无法满足规则", cells)
+        if not unknown:
+            continue
+        if max(possible) == lines:
+            fill = CROSS
+        elif min(possible) == lines + unknown:
+            fill = LINE
+        else:
+            continue
+        for e in edges:
+            if state[e] == UNKNOWN:
+                assign(e, fill)
+
+    marked = {e for e, _ in g.marks}
+    forced = {}
+    for e in range(n_edges):
+        if state[e] == UNKNOWN or e in marked:
+            continue
+        i = e // 2
+        j = i + (g.w if e % 2 else 1)
+        if g.open[i] and g.open[j]:
+            forced[g.edge_key(e)] = state[e] == LINE
+    return forced, None
+
+
+def forced_marks(forced):
+    """把 propagate 的结果转换为 Solve_mode 字典列表"""
+    return [
+        {"type": "Solve_mode", "x": x, "y": y, "data": {"dir": d, "style": "line" if is_line else "cross"}}
+        for (x, y, d), is_line in forced.items()
+    ]
\ No newline at end of file
@@ -7,16 +7,57 @@ from map_objects import ITEM_REGISTRY
 def render_scene(editor):
     """渲染主循环的一帧"""
     screen = editor.screen
+    prof = editor.profiler
     screen.fill(BG_COLOR)
+    prof.lap("clear")
     
-    # 1. 绘制所有地图物品
-    for obj in editor.objects:
-        sx, sy = editor.grid_to_screen(obj.gx, obj.gy)
-        # 视锥剔除 (Off-screen culling)
-        if -CELL_SIZE < sx < SCREEN_WIDTH and -CELL_SIZE < sy < SCREEN_HEIGHT:
-            obj.draw(screen, editor.cam_x, editor.cam_y)
-
-    # 2. 绘制幽灵光标 (预览位置)
+    # 1. 绘制可见范围内的地图物品 (只读取涉及的块；计时帧中按物品类型统计绘制耗时)
+    gx0, gy0 = editor.screen_to_grid(0, 0)
+    gx1, gy1 = editor.screen_to_grid(SCREEN_WIDTH, SCREEN_HEIGHT)
+    visible = editor.objects.in_rect(gx0 - 1, gy0 - 1, gx1 + 1, gy1 + 1)
+    if prof.timing:
+        perf = time.perf_counter
+        for obj in visible:
+            sx, sy = editor.grid_to_screen(obj.gx, obj.gy)
+            if -CELL_SIZE < sx < SCREEN_WIDTH and -CELL_SIZE < sy < SCREEN_HEIGHT:
+                t0 = perf()
+                obj.draw(screen, editor.cam_x, editor.cam_y)
+                prof.add_draw(type(obj).__name__, perf() - t0)
+    else:
+        for obj in visible:
+            sx, sy = editor.grid_to_screen(obj.gx, obj.gy)
+            # 视锥剔除 (Off-screen culling)
+            if -CELL_SIZE < sx < SCREEN_WIDTH and -CELL_SIZE < sy < SCREEN_HEIGHT:
+                obj.draw(screen, editor.cam_x, editor.cam_y)
+    prof.lap("objects")
+
+    # 2. 绘制选区
+    if editor.selection:
+        x0, y0, x1, y1 = editor.selection
+        sx, sy = editor.grid_to_screen(x0, y0)
+        rect = pygame.Rect(sx, sy, (x1 - x0 + 1) * CELL_SIZE, (y1 - y0 + 1) * CELL_SIZE)
+        clipped = rect.clip(screen.get_rect())
+        if clipped.width and clipped.height:
+            sel_surf = pygame.Surface(clipped.size, pygame.SRCALPHA)
+            sel_surf.fill(SELECT_COLOR)
+            screen.blit(sel_surf, clipped.topleft)
+        pygame.draw.rect(screen, SELECT_BORDER, rect, 2)
+    prof.lap("selection")
+
+    # 2.4 标出静态检查发现问题的格子
+    if editor.issues:
+        for issue in editor.issues:
+            for gx, gy in issue.cells:
+                sx, sy = editor.grid_to_screen(gx, gy)
+                pygame.draw.rect(screen, ISSUE_COLOR, (sx, sy, CELL_SIZE, CELL_SIZE), 3)
+        prof.lap("issues")
+
+    # 2.5 叠加显示正在查看的枚举解
+    if editor.solutions:
+        draw_solution_overlay(editor, editor.solutions[editor.solution_idx])
+        prof.lap("solutions")
+
+    # 3. 绘制幽灵光标 (预览位置)
     mx, my = pygame.mouse.get_pos()
     on_ui = any(b.rect.collidepoint((mx, my)) for b in editor.buttons)
     
@@ -38,20 +79,58 @@ def render_scene(editor):
         
         # 将绘制好的半透明层叠加到主屏幕上
         screen.blit(ghost_surf, (0, 0))
+    prof.lap("ghost")
 
-    # 3. 绘制拖拽辅助线 (如箭头方向指示)
+    # 4. 绘制拖拽辅助线 (如箭头方向指示)
     current_cls = ITEM_REGISTRY[editor.selected_item_idx]
     if editor.is_dragging_action and current_cls.has_direction:
             pygame.draw.line(screen, (255, 255, 0), editor.drag_start_pos, pygame.mouse.get_pos(), 2)
+    prof.lap("drag")
 
-    # 4. 绘制 UI 按钮
+    # 5. 绘制 UI 按钮
     for btn in editor.buttons:
         is_sel = (btn.data == editor.selected_item_idx)
         btn.draw(screen, is_sel)
+    prof.lap("ui")
         
-    # 5. 绘制底部临时消息
+    # 6. 绘制底部临时消息
     if time.time() < editor.msg_timer:
         s = editor.font.render(editor.message, True, (0, 255, 0))
         screen.blit(s, (10, SCREEN_HEIGHT - 30))
+    prof.lap("message")
 
-    pygame.display.flip()
\ No newline at end of file
+    # 7. 性能叠加层 (F3)
+    if prof.overlay:
+        draw_profiler_overlay(screen, editor.font, prof.overlay_lines())
+        prof.lap("overlay")
+
+    pygame.display.flip()
+    prof.lap("flip")
+
+def draw_profiler_overlay(screen, font, lines):
+    """在右上角绘制半透明的性能统计面板"""
+    surfs = [font.render(line, True, TEXT_COLOR) for line in lines]
+    w = max(s.get_width() for s in surfs) + 16
+    h = sum(s.get_height() for s in surfs) + 12
+    panel = pygame.Surface((w, h), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 170))
+    y = 6
+    for s in surfs:
+        panel.blit(s, (8, y))
+        y += s.get_height()
+    screen.blit(panel, (screen.get_width() - w - 10, 10))
+
+def draw_solution_overlay(editor, solution):
+    """半透明绘制一个解的连线，并在顶部显示序号"""
+    screen = editor.screen
+    overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+    half = CELL_SIZE // 2
+    for d in solution:
+        sx, sy = editor.grid_to_screen(d['x'], d['y'])
+        start = (sx + half, sy + half)
+        end = (start[0] + CELL_SIZE, start[1]) if d['data']['dir'] == 'right' else (start[0], start[1] + CELL_SIZE)
+        pygame.draw.line(overlay, SOLUTION_COLOR, start, end, 6)
+    screen.blit(overlay, (0, 0))
+    text = f"解 {editor.solution_idx + 1} / {len(editor.solutions)}    [ / ] 切换  Enter 应用  Esc 关闭"
+    s = editor.font.render(text, True, TEXT_COLOR)
+    screen.blit(s, ((screen.get_width() - s.get_width()) // 2, 10))
\ No newline at end of file
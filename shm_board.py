@@ -0,0 +1,228 @@
+"""
+编辑器与求解进程之间的共享内存盘面传输
+盘面按包围盒展开为若干字节层 (格子层 + 右/下边状态)，写入一块
+multiprocessing.shared_memory；队列中只传递一个很小的头部字典。
+求解结果 (边状态) 由子进程直接写回同一块共享内存中的结果区。
+"""
+import re
+from multiprocessing import shared_memory
+
+# 边状态编码
+EDGE_NONE, EDGE_LINE, EDGE_CROSS = 0, 1, 2
+_STYLE_CODE = {"line": EDGE_LINE, "cross": EDGE_CROSS}
+_CODE_STYLE = {EDGE_LINE: "line", EDGE_CROSS: "cross"}
+
+# Yajilin 箭头方向编码 (0 表示无)
+_DIRS = ["up", "down", "left", "right"]
+
+# 盘面分区内的层: (名称, 每格字节数)；双字节层在前以保证对齐
+# 数字层存储 num + 1，0 表示该格没有对应物品
+BOARD_LAYERS = [
+    ("endpoint", 2), ("yajilin_num", 2), ("slitherlink", 2),
+    ("floor", 1), ("simpleloop", 1), ("yajilin_dir", 1), ("edge_right", 1), ("edge_down", 1),
+]
+EDGE_LAYERS = [("edge_right", 1), ("edge_down", 1)]
+
+_NONZERO = re.compile(b"[^\x00]")
+
+# 包围盒过大 (物品相距极远) 时不使用共享内存，由调用方回退到普通队列传输
+MAX_CELLS = 4_000_000
+
+
+def _bbox(*dict_lists):
+    xs = [d['x'] for lst in dict_lists for d in lst]
+    ys = [d['y'] for lst in dict_lists for d in lst]
+    if not xs:
+        return 0, 0, 0, 0
+    return min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1
+
+
+def _layer_views(buf, offset, n, layers):
+    """在 buf[offset:] 上按层切分出 memoryview，双字节层转为 'H' 视图"""
+    views = {}
+    for name, size in layers:
+        mv = buf[offset:offset + n * size]
+        views[name] = mv.cast('H') if size == 2 else mv
+        offset += n * size
+    return views, offset
+
+
+def _nonzero(view):
+    """按字节扫描，返回层中非零元素的下标 (稀疏层无需逐格遍历)"""
+    size = view.itemsize
+    raw = view.cast('B') if size > 1 else view
+    last = -1
+    for m in _NONZERO.finditer(raw):
+        i = m.start() // size
+        if i != last:
+            yield i
+            last = i
+
+
+def _section_size(n, layers):
+    return sum(size for _, size in layers) * n
+
+
+class BoardChannel:
+    """
+    一次求解请求使用的共享内存通道
+    分区: board (当前盘面) / prior_board + prior_facts (可选，增量推理记录) / result
+    """
+    def __init__(self, shm, header, owner):
+        self.shm = shm
+        self.header = header
+        self.owner = owner
+        n = header["w"] * header["h"]
+        self.n = n
+        buf = shm.buf
+        self.board, _ = _layer_views(buf, header["board"], n, BOARD_LAYERS)
+        self.prior_board = self.prior_facts = None
+        if header.get("prior_board") is not None:
+            self.prior_board, _ = _layer_views(buf, header["prior_board"], n, BOARD_LAYERS)
+            self.prior_facts, _ = _layer_views(buf, header["prior_facts"], n, EDGE_LAYERS)
+        self.result, _ = _layer_views(buf, header["result"], n, EDGE_LAYERS)
+
+    # --- 创建 / 连接 ---
+    @classmethod
+    def create(cls, board, prior=None):
+        """
+        编辑器端: 根据盘面字典列表 (及上次推理记录) 创建通道
+        包围盒超过 MAX_CELLS 时返回 None
+        """
+        lists = [board]
+        if prior:
+            lists += [prior["board"], prior["facts"]]
+        min_x, min_y, w, h = _bbox(*lists)
+        n = w * h
+        if n > MAX_CELLS:
+            return None
+
+        header = {"min_x": min_x, "min_y": min_y, "w": w, "h": h}
+        offset = 0
+        header["board"] = offset
+        offset += _section_size(n, BOARD_LAYERS)
+        if prior:
+            header["prior_board"] = offset
+            offset += _section_size(n, BOARD_LAYERS)
+            header["prior_facts"] = offset
+            offset += _section_size(n, EDGE_LAYERS)
+        header["result"] = offset
+        offset += _section_size(n, EDGE_LAYERS)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        shm.buf[:offset] = bytes(offset)
+        header["shm"] = shm.name
+        channel = cls(shm, header, owner=True)
+        channel._write_board(channel.board, board)
+        if prior:
+            channel._write_board(channel.prior_board, prior["board"])
+            channel._write_edges(channel.prior_facts, prior["facts"])
+        return channel
+
+    @classmethod
+    def attach(cls, header):
+        """求解进程端: 根据头部连接到已有的共享内存"""
+        return cls(shared_memory.SharedMemory(name=header["shm"]), header, owner=False)
+
+    def close(self):
+        """释放视图；创建方负责删除共享内存 (可重复调用)"""
+        if self.shm is None:
+            return
+        for views in (self.board, self.prior_board, self.prior_facts, self.result):
+            for mv in (views or {}).values():
+                mv.release()
+        self.board = self.prior_board = self.prior_facts = self.result = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+    # --- 编码 ---
+    def _index(self, x, y):
+        return (y - self.header["min_y"]) * self.header["w"] + (x - self.header["min_x"])
+
+    def _write_board(self, views, objects):
+        min_x, min_y, w = self.header["min_x"], self.header["min_y"], self.header["w"]
+        floor, simpleloop, endpoint = views["floor"], views["simpleloop"], views["endpoint"]
+        for obj in objects:
+            i = (obj['y'] - min_y) * w + (obj['x'] - min_x)
+            t = obj['type']
+            if t == 'FloorCell':
+                floor[i] = 1
+            elif t == 'Simpleloop':
+                simpleloop[i] = 1
+            elif t == 'EndPoint':
+                endpoint[i] = obj.get('data', {}).get('num', 1) + 1
+            elif t == 'YajilinArrow':
+                d = obj.get('data', {})
+                views["yajilin_num"][i] = d.get('num', 0) + 1
+                views["yajilin_dir"][i] = _DIRS.index(d.get('dir', 'up')) + 1
+            elif t == 'Slitherlink':
+                views["slitherlink"][i] = obj.get('data', {}).get('num', 0) + 1
+            elif t == 'Solve_mode':
+                d = obj.get('data', {})
+                direction = d.get('dir', 'right')
+                if direction in ('right', 'down'):
+                    views["edge_" + direction][i] = _STYLE_CODE.get(d.get('style', 'line'), EDGE_LINE)
+
+    def _write_edges(self, views, objects):
+        for obj in objects:
+            d = obj['data']
+            views["edge_" + d['dir']][self._index(obj['x'], obj['y'])] = _STYLE_CODE[d['style']]
+
+    # --- 解码 ---
+    def _positions(self, layer):
+        """遍历层中非零元素，返回 (下标, x, y)"""
+        min_x, min_y, w = self.header["min_x"], self.header["min_y"], self.header["w"]
+        for i in _nonzero(layer):
+            dy, dx = divmod(i, w)
+            yield i, min_x + dx, min_y + dy
+
+    def _read_edges(self, views):
+        out = []
+        for direction in ("right", "down"):
+            layer = views["edge_" + direction]
+            out += [
+                {"type": "Solve_mode", "x": x, "y": y, "data": {"dir": direction, "style": _CODE_STYLE[layer[i]]}}
+                for i, x, y in self._positions(layer)
+            ]
+        return out
+
+    def _read_board(self, views):
+        out = []
+        for name, t in (("floor", "FloorCell"), ("simpleloop", "Simpleloop")):
+            out += [{"type": t, "x": x, "y": y, "data": {}} for _, x, y in self._positions(views[name])]
+        for name, t in (("endpoint", "EndPoint"), ("slitherlink", "Slitherlink")):
+            layer = views[name]
+            out += [{"type": t, "x": x, "y": y, "data": {"num": layer[i] - 1}} for i, x, y in self._positions(layer)]
+        nums, dirs = views["yajilin_num"], views["yajilin_dir"]
+        out += [
+            {"type": "YajilinArrow", "x": x, "y": y, "data": {"num": nums[i] - 1, "dir": _DIRS[dirs[i] - 1]}}
+            for i, x, y in self._positions(nums)
+        ]
+        return out + self._read_edges(views)
+
+    # --- 对外接口 ---
+    def read_board(self):
+        return self._read_board(self.board)
+
+    def read_prior(self):
+        """读取增量推理记录，没有时返回 None"""
+        if self.prior_board is None:
+            return None
+        return {"board": self._read_board(self.prior_board), "facts": self._read_edges(self.prior_facts)}
+
+    def write_result(self, result):
+        """求解进程端: 将 Solve_mode 结果写入结果区，返回放入队列的小消息"""
+        if result is None:
+            return None
+        for mv in self.result.values():
+            mv[:] = bytes(self.n)
+        self._write_edges(self.result, result)
+        return {"count": len(result)}
+
+    def read_result(self, message):
+        """编辑器端: 根据队列消息从结果区解码结果"""
+        if message is None:
+            return None
+        return self._read_edges(self.result)
\ No newline at end of file
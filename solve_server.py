@@ -0,0 +1,285 @@
+"""
+本地求解服务
+多个编辑器共用一个求解进程池: 任务按优先级排队，相同的请求 (模式 + 盘面 + 参数)
+在排队或运行期间只计算一次，最近完成的结果也会缓存一段时间。
+请求格式与 worker.solver_worker 相同 (盘面为 to_dict 字典列表)，通过 localhost 上的 HTTP + JSON 传输。
+
+用法:
+    python solve_server.py --port 8765 --workers 2
+编辑器中设置 config.SOLVER_SERVER_URL = "http://127.0.0.1:8765" 即改用该服务求解。
+
+接口:
+    POST   /jobs       {"mode", "board", "options", "priority"} -> 任务状态
+    GET    /jobs/<id>  -> {"id", "status", "result", "error"}
+                          status: queued / running / done / error
+    DELETE /jobs/<id>  放弃等待；没有其他客户端在等且尚未开始时从队列中移除
+"""
+import sys
+import json
+import heapq
+import hashlib
+import argparse
+import itertools
+import threading
+import multiprocessing
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from canonical import canonicalize
+
+# 默认优先级 (越大越先执行): 提示需要即时响应，整盘求解可以多等一会
+MODE_PRIORITY = {"HINT": 2, "DEDUCT": 1, "SOLVE": 0}
+RESULT_CACHE_SIZE = 256  # 缓存的已完成任务数
+
+
+def job_key(mode, board, options=None):
+    """请求摘要，用作任务 id；盘面中物品的先后顺序不影响结果"""
+    items = sorted(json.dumps(obj, sort_keys=True) for obj in board)
+    payload = json.dumps([mode, items, options or {}], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _run(mode, board, options):
+    from worker import run_mode
+    return run_mode(mode, board, options)
+
+
+class Job:
+    def __init__(self, key, mode, board, options, priority):
+        self.id = key
+        self.mode = mode
+        self.board = board
+        self.options = options
+        self.priority = priority
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.waiters = 1  # 正在等待该任务的客户端数
+
+    def to_dict(self):
+        return {"id": self.id, "status": self.status, "result": self.result, "error": self.error}
+
+
+class JobQueue:
+    """优先级队列 + 进程池；去重与缓存都以 job_key 为准"""
+    def __init__(self, workers=None, cache_size=RESULT_CACHE_SIZE):
+        workers = workers or multiprocessing.cpu_count()
+        self.cache_size = cache_size
+        self.cond = threading.Condition()
+        self.heap = []                 # [(-优先级, 序号, Job)]，提高优先级时重复入堆，出堆时跳过过期条目
+        self.seq = itertools.count()
+        self.active = {}               # id -> 排队中 / 运行中的 Job
+        self.finished = OrderedDict()  # id -> 最近完成的 Job (LRU)
+        self.closed = False
+        # 服务本身是多线程的，工作进程用 spawn 启动，避免 fork 时复制锁状态
+        self.executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        self.slots = threading.Semaphore(workers)
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def submit(self, mode, board, options=None, priority=None):
+        if priority is None:
+            priority = MODE_PRIORITY.get(mode, 0)
+        key = job_key(mode, board, options)
+        with self.cond:
+            job = self.finished.get(key)
+            if job is not None:
+                self.finished.move_to_end(key)
+                return job
+            job = self.active.get(key)
+            if job is not None:
+                job.waiters += 1
+                if job.status == "queued" and priority > job.priority:
+                    job.priority = priority
+                    heapq.heappush(self.heap, (-priority, next(self.seq), job))
+                return job
+            job = Job(key, mode, board, options or {}, priority)
+            self.active[key] = job
+            heapq.heappush(self.heap, (-priority, next(self.seq), job))
+            self.cond.notify()
+            return job
+
+    def get(self, job_id):
+        with self.cond:
+            return self.active.get(job_id) or self.finished.get(job_id)
+
+    def cancel(self, job_id):
+        """某个客户端放弃等待，返回任务是否存在"""
+        with self.cond:
+            job = self.active.get(job_id)
+            if job is None:
+                return job_id in self.finished
+            job.waiters -= 1
+            # 已在运行的任务无法中断，算完后结果照常进入缓存
+            if job.waiters <= 0 and job.status == "queued":
+                job.status = "cancelled"
+                del self.active[job_id]
+            return True
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self):
+        """空出一个工作进程时，从堆中取优先级最高的任务提交给进程池"""
+        while True:
+            self.slots.acquire()
+            with self.cond:
+                job = None
+                while job is None:
+                    while not self.heap and not self.closed:
+                        self.cond.wait()
+                    if self.closed:
+                        return
+                    _, _, job = heapq.heappop(self.heap)
+                    if job.status != "queued":
+                        job = None
+                job.status = "running"
+            future = self.executor.submit(_run, job.mode, job.board, job.options)
+            future.add_done_callback(lambda f, job=job: self._finish(job, f))
+
+    def _finish(self, job, future):
+        with self.cond:
+            try:
+                job.result = future.result()
+                job.status = "done"
+            except Exception as e:
+                job.error = str(e) or type(e).__name__
+                job.status = "error"
+            job.board = job.options = None
+            self.active.pop(job.id, None)
+            self.finished[job.id] = job
+            while len(self.finished) > self.cache_size:
+                self.finished.popitem(last=False)
+        self.slots.release()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _reply(self, code, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job_id(self):
+        parts = self.path.strip("/").split("/")
+        return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._reply(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length))
+            job = self.server.jobs.submit(req["mode"], req["board"], req.get("options"), req.get("priority"))
+        except (ValueError, KeyError, TypeError) as e:
+            return self._reply(400, {"error": f"请求格式错误: {e}"})
+        self._reply(200, job.to_dict())
+
+    def do_GET(self):
+        job = self.server.jobs.get(self._job_id())
+        if job is None:
+            return self._reply(404, {"error": "not found"})
+        self._reply(200, job.to_dict())
+
+    def do_DELETE(self):
+        found = self.server.jobs.cancel(self._job_id())
+        self._reply(200 if found else 404, {"id": self._job_id()})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=8765, workers=None):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.jobs = JobQueue(workers)
+    return server
+
+
+# --- 客户端 ---
+def _request(method, url, body=None, timeout=5):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+class RemoteJob:
+    """
+    编辑器端: 已提交到求解服务的一个任务
+    提交前把盘面换算为规范形式 (见 canonical)，平移、旋转或镜像后的同一道题共用服务端的任务与缓存；
+    取回的结果再换算回本盘面的坐标
+    """
+    def __init__(self, url, state, form):
+        self.url = url.rstrip("/")
+        self.id = state["id"]
+        self.state = state
+        self.form = form
+
+    @classmethod
+    def submit(cls, url, mode, board, options=None, priority=None):
+        """提交任务；服务不可用时抛出 OSError (urllib.error.URLError 是其子类)"""
+        form = canonicalize(board)
+        options = dict(options or {})
+        if options.get("focus") is not None:
+            options["focus"] = form.cell_to_canonical(options["focus"])
+        if options.get("prior"):
+            prior = options["prior"]
+            options["prior"] = {"board": form.to_canonical(prior["board"]), "facts": form.to_canonical(prior["facts"])}
+        body = {"mode": mode, "board": form.items, "options": options}
+        if priority is not None:
+            body["priority"] = priority
+        return cls(url, _request("POST", url.rstrip("/") + "/jobs", body), form)
+
+    def poll(self):
+        """返回 (是否结束, 结果)；出错或与服务断开时结果为 None"""
+        if self.state["status"] in ("queued", "running"):
+            try:
+                self.state = _request("GET", f"{self.url}/jobs/{self.id}")
+            except (OSError, ValueError) as e:
+                print(f"Solve server error: {e}")
+                return True, None
+        status = self.state["status"]
+        if status == "done":
+            result = self.state["result"]
+            return True, self.form.to_original(result) if result else result
+        if status == "error":
+            print(f"Solve server error: {self.state.get('error')}")
+            return True, None
+        return False, None
+
+    def cancel(self):
+        try:
+            _request("DELETE", f"{self.url}/jobs/{self.id}")
+        except (OSError, ValueError):
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地求解服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="求解进程数 (默认 CPU 核数)")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.workers)
+    print(f"求解服务运行于 http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.jobs.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,11 +1,29 @@
 import sys
+import json
+import time
 from collections import defaultdict
 import grilops
 import grilops.paths
-from z3 import sat, unsat, Or, Not, PbEq, If, Implies
+from z3 import sat, unsat, And, Or, Not, PbEq, If, Implies, Int, IntVal, Solver, Tactic
+
+import numberlink_search
+import feasibility
+import propagate
 
 # --- 辅助函数：构建模型 ---
-def _build_model(problem_data):
+def _make_z3_solver(config):
+    """
+    根据求解配置创建 Z3 Solver；config 为 None 时交给 grilops 使用默认值
+    config 可包含 'seed' (随机种子) 与 'tactic' (如 'qflia')
+    """
+    if not config:
+        return None
+    z3_solver = Tactic(config["tactic"]).solver() if config.get("tactic") else Solver()
+    if config.get("seed") is not None:
+        z3_solver.set("random_seed", config["seed"])
+    return z3_solver
+
+def _build_model(problem_data, config=None):
     """
     根据传入的数据构建 Grilops 模型和 Solver 实例，但不进行求解。
     返回上下文信息供 solve 和 deduct 使用。
@@ -29,6 +47,7 @@ def _build_model(problem_data):
     number_to_points = defaultdict(list)
     simpleloops = []
     slitherlinks = []
+    yajilin_arrows = {}
 
     for obj in objects:
         pos = (obj['x'], obj['y'])
@@ -45,14 +64,17 @@ def _build_model(problem_data):
             simpleloops.append(pos)
         elif t == 'Slitherlink':
             slitherlinks.append(obj)
+        elif t == 'YajilinArrow':
+            yajilin_arrows[pos] = obj.get('data', {})
 
     # 3. 初始化 Grilops
     lattice = grilops.get_rectangle_lattice(height, width)
     sym = grilops.paths.PathSymbolSet(lattice)
     sym.append("EMPTY", ".")
     
-    sg = grilops.SymbolGrid(lattice, sym)
-    pc = grilops.paths.PathConstrainer(sg, allow_loops=False)
+    sg = grilops.SymbolGrid(lattice, sym, _make_z3_solver(config))
+    # 有 Yajilin 箭头时按 Yajilin 规则求解: 允许 (且只允许) 回路
+    pc = grilops.paths.PathConstrainer(sg, allow_loops=bool(yajilin_arrows))
 
     # 定义各方向对应的符号集合
     s_E = [sym.EW, sym.NE, sym.SE, sym.E]
@@ -98,38 +120,40 @@ def _build_model(problem_data):
             return sg.grid[grilops.Point(gy - min_y, gx - min_x)]
         return None
 
-    # 第二次遍历对象，处理 Solve_mode
-    for obj in objects:
-        if obj['type'] == 'Solve_mode':
-            d = obj.get('data', {})
-            direction = d.get('dir', 'right')
-            style = d.get('style', 'line')
-            gx, gy = obj['x'], obj['y']
-
-            # 获取当前格和目标格（连线另一端）的变量
-            c_curr = get_cell(gx, gy)
-            if direction == 'right':
-                c_next = get_cell(gx + 1, gy)
-                target_syms_curr, target_syms_next = s_E, s_W
-            elif direction == 'down':
-                c_next = get_cell(gx, gy + 1)
-                target_syms_curr, target_syms_next = s_S, s_N
-            else:
-                continue
-
-            # 构造约束表达式
-            # 如果格子在范围内，创建 "该格子取值必须属于特定方向集合" 的逻辑
-            constraint_curr = Or([c_curr == s for s in target_syms_curr]) if c_curr is not None else None
-            constraint_next = Or([c_next == s for s in target_syms_next]) if c_next is not None else None
-
-            if style == 'line':
-                # 如果是线：强制该格必须连通
-                if constraint_curr is not None: sg.solver.add(constraint_curr)
-                if constraint_next is not None: sg.solver.add(constraint_next)
-            elif style == 'cross':
-                # 如果是叉：强制该格不能连通
-                if constraint_curr is not None: sg.solver.add(Not(constraint_curr))
-                if constraint_next is not None: sg.solver.add(Not(constraint_next))
+    # 已画的标记与规则传播确定的边一起作为固定值加入模型
+    fixed = [
+        (obj['x'], obj['y'], obj.get('data', {}).get('dir', 'right'), obj.get('data', {}).get('style', 'line'))
+        for obj in objects if obj['type'] == 'Solve_mode'
+    ]
+    forced, _ = propagate.propagate(objects)
+    forced = forced or {}  # 传播发现矛盾时不加入，交给 Z3 判定无解
+    fixed += [(gx, gy, direction, 'line' if is_line else 'cross') for (gx, gy, direction), is_line in forced.items()]
+
+    for gx, gy, direction, style in fixed:
+        # 获取当前格和目标格（连线另一端）的变量
+        c_curr = get_cell(gx, gy)
+        if direction == 'right':
+            c_next = get_cell(gx + 1, gy)
+            target_syms_curr, target_syms_next = s_E, s_W
+        elif direction == 'down':
+            c_next = get_cell(gx, gy + 1)
+            target_syms_curr, target_syms_next = s_S, s_N
+        else:
+            continue
+
+        # 构造约束表达式
+        # 如果格子在范围内，创建 "该格子取值必须属于特定方向集合" 的逻辑
+        constraint_curr = Or([c_curr == s for s in target_syms_curr]) if c_curr is not None else None
+        constraint_next = Or([c_next == s for s in target_syms_next]) if c_next is not None else None
+
+        if style == 'line':
+            # 如果是线：强制该格必须连通
+            if constraint_curr is not None: sg.solver.add(constraint_curr)
+            if constraint_next is not None: sg.solver.add(constraint_next)
+        elif style == 'cross':
+            # 如果是叉：强制该格不能连通
+            if constraint_curr is not None: sg.solver.add(Not(constraint_curr))
+            if constraint_next is not None: sg.solver.add(Not(constraint_next))
 
     # Simpleloop 约束：该格子的符号不能是 EMPTY (必须有线经过)
     for pos in simpleloops:
@@ -171,6 +195,10 @@ def _build_model(problem_data):
 
         sg.solver.add(PbEq(terms, target_num))
 
+    # Yajilin 约束
+    if yajilin_arrows:
+        _add_yajilin_constraints(sg, sym, pc, yajilin_arrows, floor_cells, min_x, min_y, width, height)
+
     # 打包上下文返回
     return {
         "sg": sg,
@@ -178,12 +206,122 @@ def _build_model(problem_data):
         "lattice": lattice,
         "min_x": min_x,
         "min_y": min_y,
-        "floor_cells": floor_cells # 用于 deduct 判断是否画叉
+        "floor_cells": floor_cells, # 用于 deduct 判断是否画叉
+        "forced": forced            # 规则传播确定的边 {(x, y, dir): 是否有线}
     }
 
+def _add_yajilin_constraints(sg, sym, pc, arrows, floor_cells, min_x, min_y, width, height):
+    """
+    Yajilin 规则:
+    - 箭头格为提示格: 既不涂黑也无线经过
+    - 其余地板格要么涂黑 (即 EMPTY)，要么有回路经过；涂黑格不能相邻
+    - 所有有线的格子属于同一个回路
+    - 箭头数字 = 箭头方向上直到盘面边缘的涂黑格数量
+    箭头计数不对每条射线单独求和，而是每行/每列只建一条前缀计数链，
+    同一行/列上的所有箭头共享该链 (区间计数 = 两个前缀之差)。
+    """
+    def point(pos):
+        return grilops.Point(pos[1] - min_y, pos[0] - min_x)
+
+    for pos in arrows:
+        sg.solver.add(sg.cell_is(point(pos), sym.EMPTY))
+
+    shaded = {pos: sg.cell_is(point(pos), sym.EMPTY) for pos in floor_cells if pos not in arrows}
+
+    # 涂黑格不相邻
+    for (x, y), s in shaded.items():
+        for n in ((x + 1, y), (x, y + 1)):
+            if n in shaded:
+                sg.solver.add(Not(And(s, shaded[n])))
+
+    # 单一回路: 所有有线格子的路径编号相同
+    loop_id = Int("yajilin_loop")
+    for pos, s in shaded.items():
+        sg.solver.add(Implies(Not(s), pc.path_instance_grid[point(pos)] == loop_id))
+
+    # 前缀计数链: chain[k] = 该行/列前 k 格中的涂黑数；不可能涂黑的格子直接沿用上一项
+    chains = {}
+    def prefix_chain(axis, index):
+        key = (axis, index)
+        if key not in chains:
+            if axis == 'row':
+                cells = [(min_x + i, index) for i in range(width)]
+            else:
+                cells = [(index, min_y + i) for i in range(height)]
+            chain = [IntVal(0)]
+            for i, pos in enumerate(cells):
+                s = shaded.get(pos)
+                if s is None:
+                    chain.append(chain[-1])
+                    continue
+                v = Int(f"yajilin_{axis}_{index}_{i}")
+                sg.solver.add(v == chain[-1] + If(s, 1, 0))
+                chain.append(v)
+            chains[key] = chain
+        return chains[key]
+
+    for (x, y), d in arrows.items():
+        num = d.get('num')
+        if num is None:
+            continue  # 无数字的箭头只作为提示格
+        direction = d.get('dir', 'up')
+        if direction in ('left', 'right'):
+            chain, k = prefix_chain('row', y), x - min_x
+        else:
+            chain, k = prefix_chain('col', x), y - min_y
+        if direction in ('left', 'up'):
+            count = chain[k]
+        else:
+            count = chain[-1] - chain[k + 1]
+        sg.solver.add(count == num)
+
+def _edge_expr(ctx, gx, gy, direction):
+    """
+    返回边 (gx, gy, direction) 上"有线"的 Z3 表达式
+    direction 为 'right' 或 'down'；格子超出模型范围时返回 None
+    """
+    sg, sym = ctx["sg"], ctx["sym"]
+    pt = grilops.Point(gy - ctx["min_y"], gx - ctx["min_x"])
+    cell = sg.grid.get(pt)
+    if cell is None:
+        return None
+    if direction == 'right':
+        target_syms = [sym.EW, sym.NE, sym.SE, sym.E]
+    else:
+        target_syms = [sym.NS, sym.SE, sym.SW, sym.S]
+    return Or([cell == s for s in target_syms])
+
+def _precheck(problem_data, tag):
+    """静态可行性检查 (见 feasibility)；发现矛盾时打印诊断并返回 False，不再交给 Z3"""
+    issues = feasibility.check_board(problem_data)
+    if issues:
+        print(f"{tag}: 静态检查发现 {len(issues)} 处问题，跳过求解")
+        for issue in issues:
+            print(f"  - {issue.message}")
+    return not issues
+
 # --- 求解函数 ---
-def solve(problem_data):
-    ctx = _build_model(problem_data)
+def solve(problem_data, portfolio=False, config=None, fast_path=True):
+    """
+    求解一个解，返回 Solve_mode 连线字典列表
+    :param portfolio: 为 True 时并行运行多种编码/配置，取最先得出的结果
+    :param config: 单一求解配置 (见 _make_z3_solver)
+    :param fast_path: 是否允许纯 Numberlink 盘面走原生搜索
+    """
+    if not _precheck(problem_data, "Solver"):
+        return []
+    if portfolio:
+        import portfolio as pf
+        return pf.run_portfolio("solve", problem_data)
+
+    # 纯 Numberlink 盘面先走原生搜索快速路径，超出节点预算再回退到 Z3
+    if fast_path and config is None:
+        fast = numberlink_search.try_solve(problem_data)
+        if fast is not None:
+            print(f"Solver: 快速路径{'求解成功' if fast else '判定无解'}")
+            return fast
+
+    ctx = _build_model(problem_data, config)
     if not ctx: return []
     
     sg = ctx["sg"]
@@ -227,8 +365,63 @@ def solve(problem_data):
 
     return solution_objects
 
+# --- 唯一性检查 ---
+def check_unique(problem_data, portfolio=False, config=None):
+    """
+    检查盘面解是否唯一。
+    返回 True(唯一解) / False(多解) / None(无解或空盘面)
+    """
+    if not _precheck(problem_data, "Unique"):
+        return None
+    if portfolio:
+        import portfolio as pf
+        return pf.run_portfolio("unique", problem_data)
+
+    ctx = _build_model(problem_data, config)
+    if not ctx: return None
+
+    sg = ctx["sg"]
+    if not sg.solve():
+        print("Unique: 盘面无解")
+        return None
+    return sg.is_unique()
+
 # --- 推理函数 ---
-def deduct(problem_data):
+# 只会收紧约束的物品类型: 盘面只新增这些物品时，之前证明的结论仍然成立
+MONOTONIC_TYPES = {"Solve_mode", "Simpleloop", "Slitherlink"}
+
+def _signature(obj):
+    return json.dumps(obj, sort_keys=True)
+
+def _reusable_facts(prior, problem_data):
+    """
+    判断当前盘面是否只是在上次推理的盘面上增加了约束
+    是则返回上次证明的确定项 {(x, y, dir): 是否有线}，否则返回空字典
+    """
+    if not prior:
+        return {}
+    old = {_signature(o) for o in prior.get("board", [])}
+    new = set()
+    for obj in problem_data:
+        sig = _signature(obj)
+        if sig not in old and obj['type'] not in MONOTONIC_TYPES:
+            return {}
+        new.add(sig)
+    if not old <= new:
+        return {}
+    return {
+        (f['x'], f['y'], f['data']['dir']): f['data']['style'] == 'line'
+        for f in prior.get("facts", [])
+    }
+
+def deduct(problem_data, prior=None):
+    """
+    计算所有确定的边 (Backbone)
+    :param prior: 上次推理的记录 {"board": 盘面数据, "facts": 推理结果}。
+                  若当前盘面只是在其基础上增加了约束，则沿用已证明的结论，只探测其余的边
+    """
+    if not _precheck(problem_data, "Deduct"):
+        return []
     ctx = _build_model(problem_data)
     if not ctx: return []
 
@@ -238,6 +431,19 @@ def deduct(problem_data):
     min_x, min_y = ctx["min_x"], ctx["min_y"]
     floor_cells = ctx["floor_cells"]
 
+    # 0. 沿用上次的结论: 作为已知约束加入模型，且不再作为候选探测
+    known = _reusable_facts(prior, problem_data)
+    for (x, y, direction), is_line in known.items():
+        expr = _edge_expr(ctx, x, y, direction)
+        if expr is not None:
+            sg.solver.add(expr if is_line else Not(expr))
+    if known:
+        print(f"Deduct: 沿用上次推理的 {len(known)} 个确定项")
+    # 规则传播确定的边已是模型中的固定值，同样不必探测
+    known = {**ctx["forced"], **known}
+    if ctx["forced"]:
+        print(f"Deduct: 规则传播确定 {len(ctx['forced'])} 个确定项")
+
     # 1. 获取第一个解 (基准解)
     if not sg.solve():
         print("Deduct: 盘面无解")
@@ -259,14 +465,19 @@ def deduct(problem_data):
     for p in lattice.points:
         grid_x, grid_y = p.x + min_x, p.y + min_y
         cell_val = first_grid[p]
+        # 非地板格的边恒为无线，且不会输出，无需探测
+        if (grid_x, grid_y) not in floor_cells:
+            continue
 
         # 检查向右的边 (Right)
-        has_right = (cell_val in s_E)
-        candidates[(p, 'right')] = has_right
+        if (grid_x + 1, grid_y) in floor_cells and (grid_x, grid_y, 'right') not in known:
+            has_right = (cell_val in s_E)
+            candidates[(p, 'right')] = has_right
 
         # 检查向下的边 (Down)
-        has_down = (cell_val in s_S)
-        candidates[(p, 'down')] = has_down
+        if (grid_x, grid_y + 1) in floor_cells and (grid_x, grid_y, 'down') not in known:
+            has_down = (cell_val in s_S)
+            candidates[(p, 'down')] = has_down
 
     # 3. 迭代循环：寻找反例
     iteration = 1
@@ -358,5 +569,144 @@ def deduct(problem_data):
                     "data": {"dir": direction, "style": "cross"}
                 })
 
+    # 5. 合并沿用的结论与规则传播的结果
+    for (x, y, direction), is_line in known.items():
+        deduced_objects.append({
+            "type": "Solve_mode",
+            "x": x,
+            "y": y,
+            "data": {"dir": direction, "style": "line" if is_line else "cross"}
+        })
+
     print(f"Deduct: 推演完成，发现 {len(deduced_objects)} 个确定项")
-    return deduced_objects
\ No newline at end of file
+    return deduced_objects
+
+# --- 单步提示 ---
+def hint(problem_data, focus=None):
+    """
+    只证明一条确定的边 (连线或叉) 就返回，不计算完整的推理结果
+    :param focus: 可选的格子坐标 (x, y)，优先考虑其附近的边
+    返回包含一个 Solve_mode 字典的列表；找不到时返回 []
+    """
+    if not _precheck(problem_data, "Hint"):
+        return []
+    ctx = _build_model(problem_data)
+    if not ctx: return []
+
+    sg = ctx["sg"]
+    floor_cells = ctx["floor_cells"]
+    if not sg.solve():
+        print("Hint: 盘面无解")
+        return []
+
+    # 1. 候选边: 两侧都是地板格且尚未标记的边
+    marked = set()
+    anchors = [focus] if focus else []
+    for obj in problem_data:
+        if obj['type'] == 'Solve_mode':
+            d = obj.get('data', {})
+            marked.add((obj['x'], obj['y'], d.get('dir', 'right')))
+            if d.get('style', 'line') == 'line':
+                anchors.append((obj['x'], obj['y']))
+    if not anchors:
+        anchors = [(obj['x'], obj['y']) for obj in problem_data if obj['type'] == 'EndPoint']
+
+    candidates = []
+    for (x, y) in floor_cells:
+        for direction, other in (('right', (x + 1, y)), ('down', (x, y + 1))):
+            if other in floor_cells and (x, y, direction) not in marked:
+                candidates.append((x, y, direction))
+
+    # 2. 按与光标 / 已有连线的距离排序，越近越先尝试
+    def distance(key):
+        x, y, _ = key
+        return min((abs(x - ax) + abs(y - ay) for ax, ay in anchors), default=0)
+    candidates.sort(key=distance)
+
+    model = sg.solver.model()
+    exprs = {key: _edge_expr(ctx, *key) for key in candidates}
+    values = {key: bool(model.eval(e, model_completion=True)) for key, e in exprs.items()}
+    refuted = set()
+
+    # 3. 逐条尝试推翻: 找不到反例即为确定项；找到的反例顺带排除其他候选
+    #    规则传播已确定的边不必调用 Z3
+    forced = ctx["forced"]
+    for key in candidates:
+        if key in refuted:
+            continue
+        if key in forced:
+            x, y, direction = key
+            style = "line" if forced[key] else "cross"
+            print(f"Hint: ({x}, {y}) {direction} 由规则传播确定为 {style}")
+            return [{"type": "Solve_mode", "x": x, "y": y, "data": {"dir": direction, "style": style}}]
+        sg.solver.push()
+        sg.solver.add(Not(exprs[key]) if values[key] else exprs[key])
+        result = sg.solver.check()
+        if result == sat:
+            model = sg.solver.model()
+            for k, e in exprs.items():
+                if bool(model.eval(e, model_completion=True)) != values[k]:
+                    refuted.add(k)
+        sg.solver.pop()
+        if result == unsat:
+            x, y, direction = key
+            style = "line" if values[key] else "cross"
+            print(f"Hint: ({x}, {y}) {direction} 确定为 {style}")
+            return [{"type": "Solve_mode", "x": x, "y": y, "data": {"dir": direction, "style": style}}]
+
+    print("Hint: 没有可证明的新提示")
+    return []
+
+# --- 枚举所有解 ---
+def iter_solutions(problem_data, limit=None, time_limit=None, config=None):
+    """
+    逐个产出盘面的不同解 (Solve_mode 连线字典列表)，每找到一个立即 yield
+    找到一个解后只对"边上是否有线"加阻断子句，路径编号等内部变量不参与，
+    同一种连线方式不会因为内部编号不同而被重复计数
+    :param limit: 最多产出的解数，None 表示不限
+    :param time_limit: 总时限 (秒)，None 表示不限
+    生成器结束时的返回值 (StopIteration.value) 为结束原因: "complete" / "limit" / "timeout"
+    """
+    if not _precheck(problem_data, "Enumerate"):
+        return "complete"
+    ctx = _build_model(problem_data, config)
+    if not ctx: return "complete"
+
+    sg = ctx["sg"]
+    floor_cells = ctx["floor_cells"]
+    edges = {}
+    for (x, y) in floor_cells:
+        for direction, other in (('right', (x + 1, y)), ('down', (x, y + 1))):
+            if other in floor_cells:
+                expr = _edge_expr(ctx, x, y, direction)
+                if expr is not None:
+                    edges[(x, y, direction)] = expr
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    count = 0
+    while limit is None or count < limit:
+        if deadline is not None:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                print(f"Enumerate: 超时，已找到 {count} 个解")
+                return "timeout"
+            sg.solver.set("timeout", max(1, int(remaining * 1000)))
+        result = sg.solver.check()
+        if result == unsat:
+            print(f"Enumerate: 共 {count} 个解")
+            return "complete"
+        if result != sat:
+            print(f"Enumerate: 超时，已找到 {count} 个解")
+            return "timeout"
+
+        model = sg.solver.model()
+        values = {key: bool(model.eval(e, model_completion=True)) for key, e in edges.items()}
+        count += 1
+        yield [
+            {"type": "Solve_mode", "x": x, "y": y, "data": {"dir": direction, "style": "line"}}
+            for (x, y, direction), is_line in values.items() if is_line
+        ]
+        # 阻断: 下一个解至少有一条边与本解不同
+        sg.solver.add(Or([Not(e) if values[key] else e for key, e in edges.items()]))
+    print(f"Enumerate: 达到上限 {limit} 个解")
+    return "limit"
\ No newline at end of file
@@ -0,0 +1,16 @@
+import enumerate_solutions
+
+
+def test_endpoint_without_floor_is_drawn():
+    """没有地板的端点格也按求解器的规则算作地板，显示其数字"""
+    board = [{"type": "FloorCell", "x": x, "y": y, "data": {}} for x in range(1, 3) for y in range(2)] + [
+        {"type": "EndPoint", "x": 0, "y": 0, "data": {"num": 1}},
+        {"type": "EndPoint", "x": 3, "y": 1, "data": {"num": 1}},
+    ]
+    solution = [
+        {"type": "Solve_mode", "x": 0, "y": 0, "data": {"dir": "right", "style": "line"}},
+        {"type": "Solve_mode", "x": 1, "y": 0, "data": {"dir": "right", "style": "line"}},
+        {"type": "Solve_mode", "x": 2, "y": 0, "data": {"dir": "down", "style": "line"}},
+        {"type": "Solve_mode", "x": 2, "y": 1, "data": {"dir": "right", "style": "line"}},
+    ]
+    assert enumerate_solutions.render_ascii(board, solution).split("\n") == ["1─┐ ", " ·└1"]
\ No newline at end of file
@@ -0,0 +1,27 @@
+import numberlink_search
+import solver
+
+
+def _floor(w, h):
+    return [{"type": "FloorCell", "x": x, "y": y, "data": {}} for x in range(w) for y in range(h)]
+
+def _end(x, y, num):
+    return {"type": "EndPoint", "x": x, "y": y, "data": {"num": num}}
+
+def _line(x, y, direction):
+    return {"type": "Solve_mode", "x": x, "y": y, "data": {"dir": direction, "style": "line"}}
+
+
+def test_floating_segment_is_traversable():
+    """未连到端点的线段可以被路径穿过，快速路径不能因此判定无解"""
+    board = _floor(5, 4) + [
+        _end(0, 3, 1), _end(0, 0, 1), _end(2, 0, 2), _end(1, 3, 2),
+        _line(0, 1, 'right'), _line(1, 1, 'right'),
+    ]
+    expected = solver.solve(board, fast_path=False)
+    assert expected  # Z3 有解
+    fast = numberlink_search.try_solve(board)
+    assert fast != []
+    if fast is not None:
+        lines = {(d['x'], d['y'], d['data']['dir']) for d in fast}
+        assert {(0, 1, 'right'), (1, 1, 'right')} <= lines
\ No newline at end of file
@@ -0,0 +1,23 @@
+import portfolio
+
+
+def _board():
+    return [{"type": "FloorCell", "x": x, "y": 0, "data": {}} for x in range(3)] + [
+        {"type": "EndPoint", "x": 0, "y": 0, "data": {"num": 1}},
+        {"type": "EndPoint", "x": 2, "y": 0, "data": {"num": 1}},
+    ]
+
+# 不存在的 Z3 tactic，创建求解器时即抛出异常
+_FAILING = [
+    {"name": "bad-a", "encoding": "grilops", "tactic": "no-such-tactic"},
+    {"name": "bad-b", "encoding": "grilops", "tactic": "no-such-tactic", "seed": 1},
+]
+
+
+def test_all_configs_fail_solve_returns_list():
+    """所有配置失败时 solve 与单一求解器无解时一样返回 []"""
+    assert portfolio.run_portfolio("solve", _board(), configs=_FAILING, log_path=None) == []
+
+
+def test_all_configs_fail_unique_returns_none():
+    assert portfolio.run_portfolio("unique", _board(), configs=_FAILING, log_path=None) is None
\ No newline at end of file
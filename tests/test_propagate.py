@@ -0,0 +1,19 @@
+import propagate
+
+
+def _floor(w, h):
+    return [{"type": "FloorCell", "x": x, "y": y, "data": {}} for x in range(w) for y in range(h)]
+
+
+def test_vertex_without_edges_reports_issue():
+    """盘面左上角的格点四周没有边，数字不为 0 时报告矛盾而不是崩溃"""
+    board = _floor(3, 3) + [{"type": "Slitherlink", "x": 0, "y": 0, "data": {"num": 1}}]
+    forced, issue = propagate.propagate(board)
+    assert forced is None
+    assert issue.cells == [(0, 0)]
+
+
+def test_vertex_without_edges_zero_is_fine():
+    board = _floor(3, 3) + [{"type": "Slitherlink", "x": 0, "y": 0, "data": {"num": 0}}]
+    forced, issue = propagate.propagate(board)
+    assert issue is None
\ No newline at end of file
@@ -2,6 +2,25 @@
 import pygame
 from config import *
 
+_tk_root = None
+
+def get_tk_root():
+    """
+    返回共享的隐藏 Tk 根窗口
+    tkinter 在首次调用时才导入；文件对话框与求解弹窗都挂在同一个根窗口下，不再每次新建
+    """
+    global _tk_root
+    import tkinter as tk
+    if _tk_root is not None:
+        try:
+            _tk_root.winfo_exists()
+        except tk.TclError:
+            _tk_root = None  # 根窗口已被销毁，重新创建
+    if _tk_root is None:
+        _tk_root = tk.Tk()
+        _tk_root.withdraw()
+    return _tk_root
+
 class Button:
     """
     简单的UI按钮类
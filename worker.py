@@ -1,20 +1,68 @@
 # worker.py
 import solver
+from config import SOLVER_PORTFOLIO
+from shm_board import BoardChannel
 
-def solver_worker(mode, data, queue):
+def run_mode(mode, data, options):
+    """按模式调用求解器 (求解进程与求解服务共用)"""
+    if mode == "SOLVE":
+        return solver.solve(data, portfolio=SOLVER_PORTFOLIO)
+    if mode == "DEDUCT":
+        return solver.deduct(data, prior=options.get("prior"))
+    if mode == "HINT":
+        return solver.hint(data, focus=options.get("focus"))
+    return []
+
+def enumerate_solutions(data, options, emit):
+    """逐个枚举解，每找到一个就调用 emit(解)；返回 {"count": 解数, "status": 结束原因}"""
+    gen = solver.iter_solutions(data, limit=options.get("limit"), time_limit=options.get("time_limit"))
+    count = 0
+    while True:
+        try:
+            solution = next(gen)
+        except StopIteration as stop:
+            return {"count": count, "status": stop.value}
+        emit(solution)
+        count += 1
+
+def standby_worker(jobs, queue):
+    """
+    待命的求解进程: 启动时已导入求解模块，从 jobs 取一个任务 (mode, data, options)
+    按 solver_worker 执行后退出
+    """
+    mode, data, options = jobs.get()
+    solver_worker(mode, data, queue, options)
+
+def solver_worker(mode, data, queue, options=None):
     """
     运行在独立进程中的求解任务
-    :param mode: 'SOLVE' 或 'DEDUCT'
-    :param data: 序列化后的盘面数据
+    :param mode: 'SOLVE' / 'DEDUCT' / 'HINT' / 'ENUMERATE'
+    :param data: 序列化后的盘面数据，或共享内存通道的头部 (见 shm_board)
     :param queue: 用于回传结果的通信队列
+    :param options: 模式相关的附加参数 (如 HINT 的 focus, DEDUCT 的 prior, ENUMERATE 的 limit / time_limit)
+    ENUMERATE 为流式回传: 每个解一条 ("solution", 解) 消息，最后一条 ("done", 统计)
     """
+    options = dict(options or {})
+    channel = None
     try:
-        result = []
-        if mode == "SOLVE":
-            result = solver.solve(data)
-        elif mode == "DEDUCT":
-            result = solver.deduct(data)
-        queue.put(result)
+        if isinstance(data, dict) and "shm" in data:
+            channel = BoardChannel.attach(data)
+            data = channel.read_board()
+            prior = channel.read_prior()
+            if prior is not None:
+                options["prior"] = prior
+
+        if mode == "ENUMERATE":
+            stats = enumerate_solutions(data, options, lambda sol: queue.put(("solution", sol)))
+            queue.put(("done", stats))
+            return
+
+        result = run_mode(mode, data, options)
+        # 使用共享内存时结果写回结果区，队列中只传一个小消息
+        queue.put(channel.write_result(result) if channel else result)
     except Exception as e:
         print(f"Worker Error: {e}")
-        queue.put(None)
\ No newline at end of file
+        queue.put(None)
+    finally:
+        if channel:
+            channel.close()
\ No newline at end of file